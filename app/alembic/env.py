@@ -84,6 +84,8 @@ async def run_async_migrations() -> None:
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        # now() в бэкфиллах пишет время в UTC, как и приложение
+        connect_args={"server_settings": {"timezone": "UTC"}},
     )
 
     async with connectable.connect() as connection:
@@ -0,0 +1,58 @@
+"""workout sessions indexes
+
+Revision ID: 4e7a9c2d81f3
+Revises: 1bd05c4ba305
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a9c2d81f3'
+down_revision: Union[str, Sequence[str], None] = '1bd05c4ba305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_workout_sessions_user_created',
+            'workout_sessions',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_workout_sessions_user_exercise_created',
+            'workout_sessions',
+            [
+                'user_id',
+                'exercise_type',
+                sa.text('created_at DESC'),
+                sa.text('id DESC'),
+            ],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_workout_sessions_user_exercise_created',
+            table_name='workout_sessions',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_workout_sessions_user_created',
+            table_name='workout_sessions',
+            postgresql_concurrently=True,
+        )
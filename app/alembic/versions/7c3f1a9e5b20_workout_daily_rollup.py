@@ -0,0 +1,62 @@
+"""workout daily rollup
+
+Revision ID: 7c3f1a9e5b20
+Revises: 4e7a9c2d81f3
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f1a9e5b20'
+down_revision: Union[str, Sequence[str], None] = '4e7a9c2d81f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'workout_daily_rollup',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'exercise_type',
+            postgresql.ENUM(name='exercise_type_enum', create_type=False),
+            nullable=False,
+        ),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('started', sa.Integer(), server_default='0', nullable=False),
+        sa.Column(
+            'completed', sa.Integer(), server_default='0', nullable=False
+        ),
+        sa.Column('failed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column(
+            'reps_sum', sa.Integer(), server_default='0', nullable=False
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'exercise_type', 'day'),
+    )
+    # Заполняем по уже существующим сессиям
+    op.execute(
+        """
+        INSERT INTO workout_daily_rollup
+            (user_id, exercise_type, day, started, completed, failed, reps_sum)
+        SELECT user_id, exercise_type, created_at::date,
+               count(*),
+               count(*) FILTER (WHERE completed),
+               count(*) FILTER (WHERE NOT completed),
+               coalesce(sum(reps_per_set_at_start) FILTER (WHERE completed), 0)
+        FROM workout_sessions
+        GROUP BY user_id, exercise_type, created_at::date
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('workout_daily_rollup')
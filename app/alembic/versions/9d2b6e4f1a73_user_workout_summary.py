@@ -0,0 +1,75 @@
+"""user workout summary
+
+Revision ID: 9d2b6e4f1a73
+Revises: 7c3f1a9e5b20
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2b6e4f1a73'
+down_revision: Union[str, Sequence[str], None] = '7c3f1a9e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_workout_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'exercise_type',
+            postgresql.ENUM(name='exercise_type_enum', create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            'session_count', sa.Integer(), server_default='0', nullable=False
+        ),
+        sa.Column(
+            'completed_count',
+            sa.Integer(),
+            server_default='0',
+            nullable=False,
+        ),
+        sa.Column('last_session_id', sa.Integer(), nullable=False),
+        sa.Column('last_session_at', sa.DateTime(), nullable=False),
+        sa.Column(
+            'updated_at',
+            sa.DateTime(),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(
+            ['last_session_id'], ['workout_sessions.id'],
+        ),
+        sa.PrimaryKeyConstraint('user_id', 'exercise_type'),
+    )
+    # Заполняем по уже существующим сессиям
+    op.execute(
+        """
+        INSERT INTO user_workout_summary
+            (user_id, exercise_type, session_count, completed_count,
+             last_session_id, last_session_at)
+        SELECT DISTINCT ON (user_id, exercise_type)
+               user_id, exercise_type,
+               count(*) OVER w,
+               count(*) FILTER (WHERE completed) OVER w,
+               id, created_at
+        FROM workout_sessions
+        WINDOW w AS (PARTITION BY user_id, exercise_type)
+        ORDER BY user_id, exercise_type, created_at DESC, id DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_workout_summary')
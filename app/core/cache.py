@@ -0,0 +1,162 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from app.core.config import settings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+R = TypeVar("R")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный LRU-кэш в памяти процесса с временем жизни записей.
+    Рассчитан на один event loop, поэтому обходится без блокировок.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        """Получить значение, если оно есть и не устарело."""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """Положить значение, вытеснив самое старое при переполнении."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        """Удалить значение по ключу."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """Счетчики попаданий и промахов для мониторинга."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных чтений: пока запрос с ключом
+    выполняется, остальные вызовы с тем же ключом ждут его результат,
+    а не идут в БД сами. Ключи сгруппированы по пользователю, запись
+    пользователя сбрасывает его ключи через invalidate: новые вызовы
+    больше не присоединяются к чтению, начатому до записи.
+    Рассчитан на один event loop, поэтому обходится без блокировок.
+    """
+
+    def __init__(self):
+        self._calls: dict[int, dict[Hashable, asyncio.Future]] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(
+        self,
+        user_id: int,
+        key: Hashable,
+        func: Callable[[], Awaitable[R]],
+    ) -> R:
+        """Выполнить func или дождаться уже идущего вызова с этим ключом."""
+        if not settings.cache.SINGLE_FLIGHT_ENABLED:
+            return await func()
+
+        calls = self._calls.setdefault(user_id, {})
+        future = calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили ведущий вызов, а не нас: читаем сами
+                if not future.cancelled():
+                    raise
+                return await func()
+
+        self.leaders += 1
+        future = asyncio.get_running_loop().create_future()
+        calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Ждущих может не быть: не даем asyncio ругаться на
+            # непрочитанное исключение
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._forget(user_id, key, future)
+
+    def _forget(self, user_id: int, key: Hashable, future) -> None:
+        calls = self._calls.get(user_id)
+        # После invalidate под ключом может быть уже другой вызов
+        if calls is not None and calls.get(key) is future:
+            del calls[key]
+            if not calls:
+                del self._calls[user_id]
+
+    def invalidate(self, user_id: int) -> None:
+        """Не присоединять новые вызовы к чтениям, начатым до записи."""
+        self._calls.pop(user_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Счетчики объединения для мониторинга."""
+        return {
+            "in_flight": sum(len(calls) for calls in self._calls.values()),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
+
+
+# Снимки колонок аутентифицированных пользователей по user_id
+user_cache: TTLCache[int, dict] = TTLCache(
+    maxsize=settings.cache.USER_CACHE_MAX_SIZE,
+    ttl=settings.cache.USER_CACHE_TTL_SECONDS,
+)
+
+# Одновременные одинаковые чтения прогресса и сессий
+read_flights = SingleFlight()
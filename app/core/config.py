@@ -1,4 +1,6 @@
-from pydantic import PostgresDsn, computed_field
+from typing import Literal
+
+from pydantic import PostgresDsn, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -6,15 +8,62 @@ from pydantic import Field
 class DatabaseSettings(BaseSettings):
     """Настройки базы данных"""
 
-    DB_HOST: str
-    DB_PORT: int
-    DB_USER: str
-    DB_PASS: str
-    DB_NAME: str
+    # postgresql — основной режим, sqlite — встроенная база в одном файле
+    DB_BACKEND: Literal["postgresql", "sqlite"] = "postgresql"
+
+    # Параметры PostgreSQL, обязательны только для DB_BACKEND=postgresql
+    DB_HOST: str | None = None
+    DB_PORT: int | None = None
+    DB_USER: str | None = None
+    DB_PASS: str | None = None
+    DB_NAME: str | None = None
+
+    # SQLite: один пишущий коннект и пул читающих (WAL)
+    DB_SQLITE_PATH: str = "fitness.db"
+    DB_SQLITE_READ_POOL_SIZE: int = 4
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_SQLITE_CACHE_SIZE_KIB: int = 65536
+    DB_SQLITE_MMAP_SIZE: int = 268435456
+
+    # Движок и пул соединений
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # PgBouncer в transaction mode не переносит именованные prepared statements
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Лог медленных запросов (0 — выключен) и доля SELECT, для которых
+    # снимается EXPLAIN (ANALYZE, BUFFERS): он выполняет запрос повторно
+    DB_SLOW_QUERY_MS: float = 500
+    DB_SLOW_QUERY_EXPLAIN_RATE: float = 0.0
+
+    # Реплика для чтения (необязательна, остальные параметры как у primary)
+    DB_REPLICA_HOST: str | None = None
+    DB_REPLICA_PORT: int | None = None
+    # Сколько секунд после записи пользователь читает с primary
+    DB_REPLICA_STICKY_SECONDS: float = 5
+
+    @model_validator(mode="after")
+    def check_postgres_settings(self) -> "DatabaseSettings":
+        if self.DB_BACKEND == "postgresql":
+            required = ("DB_HOST", "DB_PORT", "DB_USER", "DB_PASS", "DB_NAME")
+            missing = [
+                name for name in required if getattr(self, name) is None
+            ]
+            if missing:
+                raise ValueError(
+                    f"Для PostgreSQL не заданы: {', '.join(missing)}"
+                )
+        return self
 
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
+        if self.DB_BACKEND == "sqlite":
+            return f"sqlite+aiosqlite:///{self.DB_SQLITE_PATH}"
         return str(
             PostgresDsn.build(
                 scheme="postgresql+asyncpg",
@@ -26,6 +75,22 @@ class DatabaseSettings(BaseSettings):
             )
         )
 
+    @computed_field
+    @property
+    def REPLICA_DATABASE_URL(self) -> str | None:
+        if self.DB_BACKEND == "sqlite" or not self.DB_REPLICA_HOST:
+            return None
+        return str(
+            PostgresDsn.build(
+                scheme="postgresql+asyncpg",
+                username=self.DB_USER,
+                password=self.DB_PASS,
+                host=self.DB_REPLICA_HOST,
+                port=self.DB_REPLICA_PORT or self.DB_PORT,
+                path=self.DB_NAME,
+            )
+        )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -40,6 +105,48 @@ class AuthSettings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Stateless-режим: токен несет claims, и чтение не ходит в БД за User
+    CLAIMS_ONLY_AUTH: bool = False
+    # Увеличение версии отзывает все выданные stateless-токены
+    TOKEN_VERSION: int = 1
+    # Сколько bcrypt-хешей считается параллельно вне event loop
+    PASSWORD_HASH_WORKERS: int = 4
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        case_sensitive=False,
+    )
+
+
+class CacheSettings(BaseSettings):
+    """Настройки кэшей в памяти процесса"""
+
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
+    # Объединять одинаковые одновременные чтения одного пользователя
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        case_sensitive=False,
+    )
+
+
+class ObservabilitySettings(BaseSettings):
+    """Настройки метрик и диагностики"""
+
+    # Метрики запросов и БД на /metrics
+    METRICS_ENABLED: bool = True
+    # Бюджет SQL-запросов на эндпоинт: off, warn (в лог) или raise
+    QUERY_BUDGET_MODE: Literal["off", "warn", "raise"] = "off"
+    QUERY_BUDGET_DEFAULT: int = 10
+    # Столько одинаковых запросов за HTTP-запрос считается N+1
+    QUERY_REPEAT_THRESHOLD: int = 3
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -54,6 +161,10 @@ class Settings(BaseSettings):
 
     db: DatabaseSettings = Field(default_factory=DatabaseSettings)
     auth: AuthSettings = Field(default_factory=AuthSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    observability: ObservabilitySettings = Field(
+        default_factory=ObservabilitySettings
+    )
 
 
 settings = Settings()
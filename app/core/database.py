@@ -1,18 +1,359 @@
+import json
+import logging
+import random
+import time
 from typing import AsyncGenerator
+from uuid import uuid4
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
+    AsyncEngine,
     AsyncSession,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import current_route, instrument_engine
+from app.models.models import Base
 
-async_engine = create_async_engine(url=settings.db.DATABASE_URL, echo=True)
+slow_query_logger = logging.getLogger("app.slow_query")
+
+
+class PoolStats:
+    """Счетчики пула: выдачи соединений, возвраты и время ожидания."""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, engine: AsyncEngine) -> dict:
+        """Счетчики вместе с текущим состоянием пула."""
+        pool = engine.pool
+        waits = self.checkouts or 1
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checked_in": pool.checkedin(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "wait_total_seconds": self.wait_total,
+            "wait_avg_seconds": self.wait_total / waits,
+            "wait_max_seconds": self.wait_max,
+        }
+
+
+def _instrumented_pool_class(stats: PoolStats):
+    """Пул, который замеряет, сколько ждали свободного соединения."""
+
+    class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - started)
+
+    return InstrumentedQueuePool
+
+
+def _connect_args() -> dict:
+    db = settings.db
+    # Колонки created_at/updated_at без таймзоны заполняет now(): в UTC
+    # они только при UTC-таймзоне сессии, как и строки, которые
+    # приложение пишет само
+    server_settings = {"timezone": "UTC"}
+    if db.DB_PGBOUNCER_TRANSACTION_MODE:
+        return {
+            "server_settings": server_settings,
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "server_settings": server_settings,
+        "statement_cache_size": db.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": db.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    db = settings.db
+    pragmas = [
+        "PRAGMA journal_mode = WAL",
+        # В WAL-режиме NORMAL не теряет целостность, только последний коммит
+        # при отключении питания
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA foreign_keys = ON",
+        f"PRAGMA busy_timeout = {db.DB_SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size = -{db.DB_SQLITE_CACHE_SIZE_KIB}",
+        f"PRAGMA mmap_size = {db.DB_SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def _setup_sqlite(engine: AsyncEngine, read_only: bool) -> None:
+    """
+    PRAGMA на каждое соединение и явный BEGIN: pysqlite сам начинает
+    транзакцию только перед DML. Писатель берет блокировку сразу
+    (BEGIN IMMEDIATE), читатели получают снимок на всю транзакцию.
+    """
+    pragmas = _sqlite_pragmas(read_only)
+    begin = "BEGIN" if read_only else "BEGIN IMMEDIATE"
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql(begin)
+
+
+def _redact(value):
+    """Значение параметра заменяется типом: в логе не должно быть данных."""
+    if value is None or isinstance(value, bool):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def _redact_parameters(parameters, executemany: bool):
+    if executemany:
+        # Для executemany хватает числа строк и первой из них
+        return {
+            "rows": len(parameters),
+            "first": _redact_parameters(parameters[0], False)
+            if parameters
+            else None,
+        }
+    if isinstance(parameters, dict):
+        return {key: _redact(value) for key, value in parameters.items()}
+    return [_redact(value) for value in parameters or ()]
+
+
+def _explain(conn, statement: str, parameters) -> list | str:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) медленного SELECT теми же параметрами.
+    ANALYZE выполняет запрос повторно, поэтому идет в SAVEPOINT: ошибка
+    не должна ломать транзакцию запроса.
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement,
+                parameters,
+            )
+            plan = cursor.fetchone()[0]
+        except Exception as error:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN не удался: {error}"
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def _log_slow_queries(engine: AsyncEngine, name: str) -> None:
+    """
+    Писать в лог app.slow_query JSON-запись о каждом запросе дольше
+    DB_SLOW_QUERY_MS: текст, параметры без значений, маршрут и для доли
+    DB_SLOW_QUERY_EXPLAIN_RATE медленных SELECT в PostgreSQL — план.
+    """
+    db = settings.db
+    threshold = db.DB_SLOW_QUERY_MS / 1000
+    can_explain = engine.dialect.name == "postgresql"
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(
+            time.perf_counter()
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_started"].pop()
+        if elapsed < threshold:
+            return
+        record = {
+            "event": "slow_query",
+            "engine": name,
+            "duration_ms": round(elapsed * 1000, 2),
+            "threshold_ms": db.DB_SLOW_QUERY_MS,
+            "route": current_route(),
+            "statement": statement,
+            "parameters": _redact_parameters(parameters, executemany),
+        }
+        if (
+            can_explain
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < db.DB_SLOW_QUERY_EXPLAIN_RATE
+        ):
+            record["plan"] = _explain(conn, statement, parameters)
+        slow_query_logger.warning(
+            json.dumps(record, ensure_ascii=False, default=str)
+        )
+
+
+def build_engine(
+    url: str,
+    stats: PoolStats,
+    read_only: bool = False,
+    name: str = "primary",
+) -> AsyncEngine:
+    """
+    Создать движок с настройками пула из DatabaseSettings.
+    Для SQLite пишущий движок держит одно соединение, а read_only —
+    пул читателей. name — метка движка в метриках.
+    """
+    db = settings.db
+    if url.startswith("sqlite"):
+        pool_options = {
+            "pool_size": db.DB_SQLITE_READ_POOL_SIZE if read_only else 1,
+            "max_overflow": 0,
+        }
+    else:
+        pool_options = {
+            "pool_size": db.DB_POOL_SIZE,
+            "max_overflow": db.DB_MAX_OVERFLOW,
+            "connect_args": _connect_args(),
+        }
+    engine = create_async_engine(
+        url=url,
+        echo=db.DB_ECHO,
+        poolclass=_instrumented_pool_class(stats),
+        pool_timeout=db.DB_POOL_TIMEOUT,
+        pool_recycle=db.DB_POOL_RECYCLE,
+        pool_pre_ping=db.DB_POOL_PRE_PING,
+        **pool_options,
+    )
+    if url.startswith("sqlite"):
+        _setup_sqlite(engine, read_only)
+    # Всегда: QueryBudgetMiddleware читает режим на каждом запросе и
+    # без счетчиков курсора видел бы ноль запросов
+    instrument_engine(engine, name)
+    if settings.db.DB_SLOW_QUERY_MS > 0:
+        _log_slow_queries(engine, name)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    return engine
+
+
+pool_stats = PoolStats()
+
+async_engine = build_engine(settings.db.DATABASE_URL, pool_stats)
 
 async_session = async_sessionmaker(
     async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+replica_pool_stats = PoolStats()
+
+if settings.db.DB_BACKEND == "sqlite":
+    # Вместо реплики — пул читателей того же файла
+    replica_engine = build_engine(
+        settings.db.DATABASE_URL,
+        replica_pool_stats,
+        read_only=True,
+        name="reader",
+    )
+elif settings.db.REPLICA_DATABASE_URL:
+    replica_engine = build_engine(
+        settings.db.REPLICA_DATABASE_URL, replica_pool_stats, name="replica"
+    )
+else:
+    replica_engine = None
+
+replica_session = (
+    async_sessionmaker(
+        replica_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    if replica_engine is not None
+    else None
+)
+
+# Читатели SQLite видят закоммиченное сразу, отставать может только
+# настоящая реплика
+_replica_can_lag = settings.db.DB_BACKEND == "postgresql"
+
+# Пользователи, которые недавно писали: их чтения идут в primary,
+# чтобы не увидеть отставшую реплику (read-your-writes)
+_recent_writers: TTLCache[int, bool] = TTLCache(
+    maxsize=100_000, ttl=settings.db.DB_REPLICA_STICKY_SECONDS
+)
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+def mark_primary_sticky(user_id: int) -> None:
+    """Отметить запись пользователя: какое-то время читаем с primary."""
+    if replica_session is not None and _replica_can_lag:
+        _recent_writers.set(user_id, True)
+
+
+def reads_from_primary(user_id: int) -> bool:
+    """Нужно ли читать данные пользователя с primary."""
+    return replica_session is None or user_id in _recent_writers
+
+
+async def init_schema(engine: AsyncEngine = async_engine) -> None:
+    """
+    Создать недостающие таблицы. Нужно для SQLite: миграции Alembic
+    написаны под PostgreSQL.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines() -> None:
+    """Закрыть пулы. Потоки aiosqlite иначе не дают процессу завершиться."""
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+def pool_status() -> dict:
+    """Статистика пула соединений для мониторинга."""
+    status = {"primary": pool_stats.snapshot(async_engine)}
+    if replica_engine is not None:
+        name = "replica" if _replica_can_lag else "reader"
+        status[name] = replica_pool_stats.snapshot(replica_engine)
+    return status
@@ -0,0 +1,312 @@
+"""
+Метрики запросов и БД в формате Prometheus без сторонних библиотек.
+
+Middleware считает задержку по шаблону маршрута, запросы в работе и
+число/время SQL-запросов на один HTTP-запрос. SQL-запросы ловятся
+событиями курсора SQLAlchemy и складываются в RequestStats текущего
+запроса через contextvar. Всё обновляется в event loop, без блокировок.
+"""
+
+import collections
+import time
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами и метками."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # метки -> [счетчики по корзинам (+Inf последней), сумма]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            ]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = _format_labels(("le",), (_format_value(bound),))
+                yield f"{self.name}_bucket{_merge(base, le)} {cumulative}"
+            yield f"{self.name}_sum{base} {_format_value(total)}"
+            yield f"{self.name}_count{base} {cumulative}"
+
+
+class Counter:
+    """Монотонный счетчик с метками."""
+
+    def __init__(
+        self, name: str, documentation: str, label_names: tuple[str, ...]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            base = _format_labels(self.label_names, labels)
+            yield f"{self.name}{base} {_format_value(value)}"
+
+
+class RequestStats:
+    """
+    SQL-запросы одного HTTP-запроса. statements (текст -> сколько раз)
+    заполняется, только если его включили: нужен бюджету запросов.
+    """
+
+    __slots__ = ("queries", "query_seconds", "statements", "scope")
+
+    def __init__(self, scope: dict | None = None):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements: collections.Counter[str] | None = None
+        self.scope = scope
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+requests_in_flight = 0
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ("method", "route", "status"),
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Число SQL-запросов на один HTTP-запрос",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов на один HTTP-запрос",
+    ("method", "route"),
+)
+db_queries_total = Counter(
+    "db_queries_total", "Выполнено SQL-запросов", ("engine",)
+)
+db_query_seconds_total = Counter(
+    "db_query_seconds_total", "Время выполнения SQL-запросов", ("engine",)
+)
+
+
+def current_request_stats() -> RequestStats | None:
+    """Статистика SQL текущего HTTP-запроса, если он есть."""
+    return _request_stats.get()
+
+
+def current_route() -> str | None:
+    """Метод и шаблон маршрута HTTP-запроса, выполняющего SQL."""
+    stats = _request_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    path = route.path if route is not None else stats.scope["path"]
+    return f"{stats.scope['method']} {path}"
+
+
+def start_request_stats(
+    scope: dict | None = None,
+) -> tuple[RequestStats, Token]:
+    """Начать сбор статистики SQL; token передать в reset_request_stats."""
+    stats = RequestStats(scope)
+    return stats, _request_stats.set(stats)
+
+
+def reset_request_stats(token: Token) -> None:
+    _request_stats.reset(token)
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Считать число и время SQL-запросов движка."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries_total.inc(1, name)
+        db_query_seconds_total.inc(elapsed, name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+            if stats.statements is not None:
+                stats.statements[statement] += 1
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: задержка по маршруту и SQL на запрос. Чистый ASGI,
+    а не BaseHTTPMiddleware, чтобы не создавать лишнюю задачу на запрос.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global requests_in_flight
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = start_request_stats(scope)
+        requests_in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_flight -= 1
+            reset_request_stats(token)
+            method = scope["method"]
+            # Шаблон пути, а не сам путь: иначе id раздувают число серий
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(
+                elapsed, method, route, str(status_code)
+            )
+            http_request_db_queries.observe(stats.queries, method, route)
+            http_request_db_seconds.observe(
+                stats.query_seconds, method, route
+            )
+
+
+class RequestContextMiddleware:
+    """
+    Только RequestStats текущего запроса, без замеров: по нему лог
+    медленных запросов находит маршрут, когда MetricsMiddleware нет.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or current_request_stats() is not None:
+            await self.app(scope, receive, send)
+            return
+
+        _, token = start_request_stats(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request_stats(token)
+
+
+def render_metrics(pools: dict[str, dict]) -> str:
+    """
+    Все метрики в текстовом формате Prometheus. pools — результат
+    pool_status(): ожидание соединения берется из PoolStats.
+    """
+    lines = [
+        "# HELP http_requests_in_flight HTTP-запросы в обработке",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {requests_in_flight}",
+    ]
+    for metric in (
+        http_request_duration,
+        http_request_db_queries,
+        http_request_db_seconds,
+        db_queries_total,
+        db_query_seconds_total,
+    ):
+        lines.extend(metric.collect())
+
+    pool_metrics = (
+        ("db_pool_checkouts_total", "counter", "checkouts"),
+        ("db_pool_timeouts_total", "counter", "timeouts"),
+        ("db_pool_wait_seconds_total", "counter", "wait_total_seconds"),
+        ("db_pool_wait_max_seconds", "gauge", "wait_max_seconds"),
+        ("db_pool_checked_out", "gauge", "checked_out"),
+        ("db_pool_size", "gauge", "size"),
+    )
+    for name, kind, key in pool_metrics:
+        lines.append(f"# TYPE {name} {kind}")
+        for pool, snapshot in pools.items():
+            labels = _format_labels(("pool",), (pool,))
+            lines.append(f"{name}{labels} {_format_value(snapshot[key])}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _merge(base: str, extra: str) -> str:
+    if not base:
+        return extra
+    return base[:-1] + "," + extra[1:]
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format_value(value) -> str:
+    return value if isinstance(value, str) else repr(value)
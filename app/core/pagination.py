@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, id_: int) -> str:
+    """Упаковать позицию (created_at, id) в непрозрачный курсор."""
+    raw = json.dumps([created_at.isoformat(), id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Распаковать курсор обратно в (created_at, id).
+    Бросает ValueError, если курсор поврежден.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        created_at, id_ = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id_)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Некорректный курсор") from exc
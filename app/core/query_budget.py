@@ -0,0 +1,148 @@
+"""
+Бюджет SQL-запросов на эндпоинт и поиск N+1 для отладки и тестов.
+
+Эндпоинт объявляет бюджет декоратором @query_budget(n), остальные
+получают QUERY_BUDGET_DEFAULT. QueryBudgetMiddleware записывает тексты
+SQL текущего запроса (через RequestStats из app.core.metrics) и после
+ответа проверяет число запросов и повторы одного и того же запроса с
+разными параметрами. В режиме warn нарушение пишется в лог, в режиме
+raise поднимается QueryBudgetExceeded — тест через ASGITransport падает.
+"""
+
+import collections
+import logging
+import re
+from typing import Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import (
+    current_request_stats,
+    reset_request_stats,
+    start_request_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+# Плейсхолдеры asyncpg ($1), sqlite (?) и pyformat (%(name)s)
+_PLACEHOLDER = re.compile(r"\$\d+|\?|%\(\w+\)s")
+# Раскрытый IN (?, ?, ?) с разной длиной списка — тот же запрос
+_PLACEHOLDER_LIST = re.compile(r"\?(::\w+)?(?:\s*,\s*\?(?:::\w+)?)+")
+_TRANSACTION_CONTROL = (
+    "BEGIN",
+    "COMMIT",
+    "ROLLBACK",
+    "SAVEPOINT",
+    "RELEASE",
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """Эндпоинт выполнил больше SQL-запросов, чем объявил, или N+1."""
+
+
+def query_budget(limit: int) -> Callable[[F], F]:
+    """Объявить, сколько SQL-запросов допустимо для эндпоинта."""
+
+    def decorator(endpoint: F) -> F:
+        endpoint.query_budget = limit
+        return endpoint
+
+    return decorator
+
+
+def normalize_statement(statement: str) -> str:
+    """Текст запроса без различий в параметрах."""
+    statement = _PLACEHOLDER.sub("?", " ".join(statement.split()))
+    return _PLACEHOLDER_LIST.sub(r"?\1", statement)
+
+
+def _is_transaction_control(statement: str) -> bool:
+    # SQLite-движок шлет BEGIN сам, asyncpg — нет: не считаем ни там, ни там
+    return statement.lstrip().upper().startswith(_TRANSACTION_CONTROL)
+
+
+def find_repeated(
+    statements: collections.Counter[str], threshold: int
+) -> dict[str, int]:
+    """Запросы, повторенные не меньше threshold раз (признак N+1)."""
+    normalized: collections.Counter[str] = collections.Counter()
+    for statement, count in statements.items():
+        if not _is_transaction_control(statement):
+            normalized[normalize_statement(statement)] += count
+    return {
+        statement: count
+        for statement, count in normalized.items()
+        if count >= threshold
+    }
+
+
+def check_query_budget(
+    route: str,
+    budget: int,
+    statements: collections.Counter[str],
+) -> list[str]:
+    """Описания нарушений бюджета для маршрута."""
+    problems = []
+    total = sum(
+        count
+        for statement, count in statements.items()
+        if not _is_transaction_control(statement)
+    )
+    if total > budget:
+        problems.append(
+            f"{route}: {total} SQL-запросов при бюджете {budget}"
+        )
+    repeated = find_repeated(
+        statements, settings.observability.QUERY_REPEAT_THRESHOLD
+    )
+    for statement, count in repeated.items():
+        problems.append(f"{route}: N+1, {count} раз: {statement}")
+    return problems
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware, проверяющая бюджет после обработки запроса.
+    Включается QUERY_BUDGET_MODE=warn|raise, для production не нужна.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = settings.observability.QUERY_BUDGET_MODE
+        if scope["type"] != "http" or mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        # Внутри MetricsMiddleware статистика уже собирается
+        stats = current_request_stats()
+        token = None
+        if stats is None:
+            stats, token = start_request_stats(scope)
+        stats.statements = collections.Counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                reset_request_stats(token)
+
+        route = scope.get("route")
+        if route is None:
+            return
+        budget = getattr(
+            route.endpoint,
+            "query_budget",
+            settings.observability.QUERY_BUDGET_DEFAULT,
+        )
+        problems = check_query_budget(
+            f"{scope['method']} {route.path}", budget, stats.statements
+        )
+        if not problems:
+            return
+        if mode == "raise":
+            raise QueryBudgetExceeded("\n".join(problems))
+        for problem in problems:
+            logger.warning(problem)
@@ -1,52 +1,161 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import hashlib
+from typing import AsyncGenerator, Callable, TypeVar
 import bcrypt
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from app.core.database import get_session
+from app.core.cache import user_cache
+from app.core.database import (
+    get_session,
+    reads_from_primary,
+    replica_session,
+)
 from app.dao.users_dao import UsersDAO
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.core.config import settings
 from app.models.models import User
+from app.schemas.users import PrincipalSchema
 
 
 _ROUNDS = 12
 
+R = TypeVar("R")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_session),
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str) -> dict:
+    """Проверить подпись и срок токена, вернуть payload."""
     try:
         payload = jwt.decode(
             token,
             settings.auth.SECRET_KEY,
             algorithms=[settings.auth.ALGORITHM],
         )
-        user_id: str | None = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_session),
+) -> User:
+    payload = _decode_token(token)
 
-    dao = UsersDAO(session)
-    user = await dao.get_by_id(int(user_id))
+    user = await _load_user(session, int(payload["sub"]))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_session),
+) -> PrincipalSchema:
+    """
+    Облегченная зависимость для эндпоинтов, которым нужен только id.
+    В режиме CLAIMS_ONLY_AUTH доверяет claims токена и не ходит в БД,
+    иначе загружает пользователя как get_current_user.
+    """
+    payload = _decode_token(token)
+
+    if (
+        settings.auth.CLAIMS_ONLY_AUTH
+        and payload.get("ver") == settings.auth.TOKEN_VERSION
+        and payload.get("username") is not None
+    ):
+        return PrincipalSchema(
+            id=int(payload["sub"]), username=payload["username"]
+        )
+
+    user = await _load_user(session, int(payload["sub"]))
+    if user is None:
+        raise _credentials_exception()
+
+    return PrincipalSchema(id=user.id, username=user.username)
+
+
+async def get_read_session(
+    principal: PrincipalSchema = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для только читающих вызовов сервисов. Идет в реплику, если
+    она настроена и пользователь недавно ничего не записывал, иначе
+    отдает ту же сессию primary, что и get_session.
+    """
+    async for read_session in _read_session_for(principal.id, session):
+        yield read_session
+
+
+async def get_user_read_session(
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    То же, что get_read_session, для эндпоинтов с get_current_user:
+    токен разбирается и пользователь грузится один раз.
+    """
+    async for read_session in _read_session_for(user.id, session):
+        yield read_session
+
+
+async def _read_session_for(
+    user_id: int, session: AsyncSession
+) -> AsyncGenerator[AsyncSession, None]:
+    if reads_from_primary(user_id):
+        yield session
+        return
+
+    async with replica_session() as read_session:
+        yield read_session
+
+
+def _user_snapshot(user: User) -> dict:
+    """Снимок колонок пользователя для кэша."""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(User).column_attrs
+    }
+
+
+async def _load_user(session: AsyncSession, user_id: int) -> User | None:
+    """Загрузить пользователя, по возможности из кэша в памяти."""
+    if not settings.cache.USER_CACHE_ENABLED:
+        return await UsersDAO(session).get_by_id(user_id)
+
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        # load=False привязывает объект к сессии без запроса в БД,
+        # ленивые связи при этом продолжают работать
+        return await session.merge(user, load=False)
+
+    user = await UsersDAO(session).get_by_id(user_id)
+    if user is not None:
+        user_cache.set(user_id, _user_snapshot(user))
+    return user
+
+
 def _prehash(password: str) -> bytes:
     return hashlib.sha256(password.encode("utf-8")).digest()
 
@@ -63,13 +172,91 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(prehashed, hashed_password.encode("utf-8"))
 
 
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном пуле потоков, чтобы хеширование
+    не блокировало event loop. bcrypt отпускает GIL, поэтому потоки
+    действительно считают параллельно. Счетчики меняются только
+    из event loop и не требуют блокировок.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="bcrypt",
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., R], *args) -> R:
+        """Выполнить func в пуле, дождавшись свободного воркера."""
+        self.queue_depth += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.auth.PASSWORD_HASH_WORKERS
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Захешировать пароль, не блокируя event loop."""
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    """Проверить пароль, не блокируя event loop."""
+    return await password_hasher.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(
     subject: str,
     expires_delta: timedelta | None = None,
+    claims: dict | None = None,
 ) -> str:
     """
     Создает подписанный JWT access token.
     subject — идентификатор пользователя (user_id / username).
+    claims — дополнительные поля payload (для stateless-режима).
     """
     now = datetime.now(timezone.utc)
 
@@ -84,6 +271,8 @@ def create_access_token(
         "iat": now,
         "exp": expire,
     }
+    if claims:
+        payload.update(claims)
 
     return jwt.encode(
         payload,
@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Any, Mapping
+
+import orjson
+from fastapi import status
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from pydantic import TypeAdapter
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """orjson-ответ, даты в UTC пишутся с "Z", как у Pydantic."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        )
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter на тип строится один раз и переиспользуется."""
+    return TypeAdapter(tp)
+
+
+def orm_response(
+    tp: Any,
+    data: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Mapping[str, str] | None = None,
+) -> ORJSONResponse:
+    """
+    Провалидировать ORM-объекты (или dict с ними) ровно один раз и
+    закодировать orjson. FastAPI не валидирует возвращенный Response
+    повторно через response_model.
+    """
+    adapter = get_type_adapter(tp)
+    validated = adapter.validate_python(data, from_attributes=True)
+    return ORJSONResponse(
+        adapter.dump_python(validated),
+        status_code=status_code,
+        headers=headers,
+    )
@@ -1,8 +1,19 @@
 from typing import Type, TypeVar, Generic, Any, Sequence
-from sqlalchemy import select, exists, update, delete, func
+from sqlalchemy import (
+    select,
+    exists,
+    insert,
+    update,
+    delete,
+    func,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Load
 from typing import List
+from app.dao.sql import upsert_insert
 
 T = TypeVar("T", bound=DeclarativeBase)
 
@@ -13,6 +24,28 @@ class BaseDAO(Generic[T]):
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @property
+    def dialect_name(self) -> str:
+        """Диалект базы, к которой привязана сессия."""
+        return self.session.get_bind().dialect.name
+
+    def upsert_insert(self):
+        """INSERT ... ON CONFLICT по модели для текущего диалекта."""
+        return upsert_insert(self.dialect_name, self.model)
+
+    async def lock_for_rebuild(self) -> None:
+        """
+        Заблокировать таблицу от записи до конца транзакции. В SQLite
+        запись и так идет одной транзакцией за раз.
+        """
+        if self.dialect_name == "postgresql":
+            await self.session.execute(
+                text(
+                    f"LOCK TABLE {self.model.__tablename__} "
+                    "IN SHARE ROW EXCLUSIVE MODE"
+                )
+            )
+
     async def list(
         self,
         *expressions,
@@ -61,6 +94,62 @@ class BaseDAO(Generic[T]):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    def _columns(self, columns: Sequence[str] | None = None) -> list:
+        """Атрибуты-колонки модели по именам (по умолчанию — все)."""
+        names = columns or [
+            attr.key for attr in inspect(self.model).column_attrs
+        ]
+        return [getattr(self.model, name) for name in names]
+
+    async def list_rows(
+        self,
+        *expressions,
+        columns: Sequence[str] | None = None,
+        order_by=None,
+        limit: int | None = None,
+        offset: int | None = None,
+        **filters
+    ) -> List[Row]:
+        """
+        Как list, но выбирает только колонки и возвращает Row.
+        ORM-сущности не создаются и не попадают в identity map,
+        поэтому подходит только для чтения.
+        """
+        stmt = (
+            select(*self._columns(columns))
+            .filter(*expressions)
+            .filter_by(**filters)
+        )
+
+        if order_by is not None:
+            stmt = stmt.order_by(
+                *(order_by if isinstance(order_by, list) else [order_by])
+            )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        if offset is not None:
+            stmt = stmt.offset(offset)
+
+        result = await self.session.execute(stmt)
+        return list(result.all())
+
+    async def find_one_row(
+        self,
+        *expressions,
+        columns: Sequence[str] | None = None,
+        order_by=None,
+        **filters
+    ) -> Row | None:
+        """Как find_one, но возвращает Row вместо ORM-сущности."""
+        rows = await self.list_rows(
+            *expressions,
+            columns=columns,
+            order_by=order_by,
+            limit=1,
+            **filters,
+        )
+        return rows[0] if rows else None
+
     async def get_by_id_with_options(
         self, id_: int, *options: Load
     ) -> T | None:
@@ -92,6 +181,47 @@ class BaseDAO(Generic[T]):
         obj = self.model(**data)
         return await self.save(obj)
 
+    async def bulk_create(self, rows: Sequence[dict[str, Any]]) -> List[T]:
+        """
+        Вставить несколько элементов одним multi-row INSERT ... RETURNING.
+        Возвращает элементы в порядке rows.
+        """
+        if not rows:
+            return []
+        stmt = insert(self.model).returning(
+            self.model, sort_by_parameter_order=True
+        )
+        result = await self.session.scalars(stmt, list(rows))
+        return list(result.all())
+
+    async def upsert(
+        self,
+        rows: Sequence[dict[str, Any]],
+        index_elements: Sequence[str] | None = None,
+        update_columns: Sequence[str] | None = None,
+    ) -> List[T]:
+        """
+        INSERT ... ON CONFLICT ... RETURNING одним запросом.
+        update_columns перезаписываются значениями из вставки (DO UPDATE).
+        Без них конфликтующие строки пропускаются (DO NOTHING) и не
+        попадают в результат — так вызывающий узнает о конфликте.
+        """
+        if not rows:
+            return []
+        stmt = self.upsert_insert().values(list(rows))
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={name: stmt.excluded[name] for name in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        stmt = stmt.returning(self.model).execution_options(
+            populate_existing=True
+        )
+        result = await self.session.scalars(stmt)
+        return list(result.all())
+
     async def save(self, obj: T) -> T:
         """Сохранить элемент в базе в рамках трансакции."""
         self.session.add(obj)
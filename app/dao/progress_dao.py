@@ -1,3 +1,8 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+
 from app.dao.base import BaseDAO
 from app.models.models import UserProgress, ExerciseType
 
@@ -5,9 +10,9 @@ from app.models.models import UserProgress, ExerciseType
 class UserProgressDAO(BaseDAO[UserProgress]):
     model = UserProgress
 
-    async def list_by_user_id(self, user_id: int) -> list[UserProgress]:
+    async def list_by_user_id(self, user_id: int) -> list[Row]:
         """Получить весь прогресс данного пользователя."""
-        return await self.list(
+        return await self.list_rows(
             user_id=user_id,
             order_by=self.model.updated_at.desc(),
             # options=[
@@ -19,8 +24,27 @@ class UserProgressDAO(BaseDAO[UserProgress]):
         self,
         user_id: int,
         exercise_type: ExerciseType,
-    ) -> UserProgress | None:
+    ) -> Row | None:
         """Получить прогресс для определенного упражнения."""
-        return await self.find_one(
+        return await self.find_one_row(
             user_id=user_id, exercise_type=exercise_type
         )
+
+    async def list_for_update(self, user_id: int) -> list[UserProgress]:
+        """Получить прогресс пользователя с блокировкой строк до коммита."""
+        stmt = (
+            select(self.model)
+            .where(self.model.user_id == user_id)
+            .with_for_update()
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_version(self, user_id: int) -> tuple[int, datetime | None]:
+        """Количество строк и max(updated_at) — дешевый валидатор для ETag."""
+        stmt = select(
+            func.count(), func.max(self.model.updated_at)
+        ).where(self.model.user_id == user_id)
+        result = await self.session.execute(stmt)
+        count, last_modified = result.one()
+        return count, last_modified
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Sequence
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Row
+
+from app.dao.base import BaseDAO
+from app.dao.sql import day_of
+from app.models.models import (
+    ExerciseType,
+    WorkoutDailyRollup,
+    WorkoutSession,
+)
+
+COUNTERS = ("started", "completed", "failed", "reps_sum")
+
+
+def session_counters(completed: bool, reps: int) -> dict[str, int]:
+    """Вклад одной сессии в дневные счетчики."""
+    return {
+        "started": 1,
+        "completed": int(completed),
+        "failed": int(not completed),
+        "reps_sum": reps if completed else 0,
+    }
+
+
+def merge_rollup_rows(rows: Iterable[dict]) -> list[dict]:
+    """
+    Сложить счетчики строк с одинаковым ключом.
+    Один INSERT ... ON CONFLICT не может обновить строку дважды.
+    """
+    merged: dict[tuple, dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(COUNTERS, 0)
+    )
+    for row in rows:
+        counters = merged[(row["user_id"], row["exercise_type"], row["day"])]
+        for name in COUNTERS:
+            counters[name] += row.get(name, 0)
+    return [
+        {"user_id": user_id, "exercise_type": exercise, "day": day, **counts}
+        for (user_id, exercise, day), counts in merged.items()
+    ]
+
+
+class WorkoutDailyRollupDAO(BaseDAO[WorkoutDailyRollup]):
+    model = WorkoutDailyRollup
+
+    async def increment(self, rows: Sequence[dict]) -> None:
+        """Прибавить счетчики к дневным строкам, создав недостающие."""
+        rows = merge_rollup_rows(rows)
+        if not rows:
+            return
+        stmt = self.upsert_insert().values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "exercise_type", "day"],
+            set_={
+                name: getattr(self.model, name) + getattr(stmt.excluded, name)
+                for name in COUNTERS
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def list_by_user(
+        self,
+        user_id: int,
+        date_from: date,
+        date_to: date,
+        exercise_type: ExerciseType | None = None,
+    ) -> list[Row]:
+        """Дневные строки пользователя за период, от новых к старым."""
+        filters = {"user_id": user_id}
+        if exercise_type:
+            filters["exercise_type"] = exercise_type
+        return await self.list_rows(
+            self.model.day.between(date_from, date_to),
+            order_by=[self.model.day.desc(), self.model.exercise_type],
+            **filters,
+        )
+
+    async def rebuild_for_users(self, first_id: int, last_id: int) -> int:
+        """
+        Пересчитать строки пользователей first_id..last_id из сессий.
+        Таблица блокируется от записи до конца транзакции, чтобы
+        параллельные start/finish не потерялись между DELETE и INSERT.
+        """
+        ws = WorkoutSession
+        await self.lock_for_rebuild()
+        await self.session.execute(
+            delete(self.model).where(
+                self.model.user_id.between(first_id, last_id)
+            )
+        )
+        completed = ws.completed.is_(True)
+        aggregated = (
+            select(
+                ws.user_id,
+                ws.exercise_type,
+                day_of(ws.created_at),
+                func.count(),
+                func.count().filter(completed),
+                func.count().filter(ws.completed.is_(False)),
+                func.coalesce(
+                    func.sum(ws.reps_per_set_at_start).filter(completed), 0
+                ),
+            )
+            .where(ws.user_id.between(first_id, last_id))
+            .group_by(ws.user_id, ws.exercise_type, day_of(ws.created_at))
+        )
+        result = await self.session.execute(
+            insert(self.model).from_select(
+                ["user_id", "exercise_type", "day", *COUNTERS], aggregated
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,37 @@
+"""
+SQL-конструкции, которые по-разному пишутся в PostgreSQL и SQLite.
+"""
+
+from sqlalchemy import Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class day_of(FunctionElement):
+    """
+    Дата из timestamp. В PostgreSQL — CAST(x AS DATE), в SQLite —
+    date(x): там CAST к DATE дает число (год).
+    """
+
+    type = Date()
+    name = "day_of"
+    inherit_cache = True
+
+
+@compiles(day_of)
+def _compile_day_of(element, compiler, **kw):
+    return f"CAST({compiler.process(element.clauses, **kw)} AS DATE)"
+
+
+@compiles(day_of, "sqlite")
+def _compile_day_of_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+def upsert_insert(dialect_name: str, table):
+    """INSERT с поддержкой ON CONFLICT для указанного диалекта."""
+    if dialect_name == "sqlite":
+        return sqlite_insert(table)
+    return pg_insert(table)
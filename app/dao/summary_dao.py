@@ -0,0 +1,166 @@
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select, tuple_
+from sqlalchemy.engine import Row
+
+from app.dao.base import BaseDAO
+from app.models.models import ExerciseType, UserWorkoutSummary, WorkoutSession
+
+
+def merge_summary_rows(sessions: Iterable[dict]) -> list[dict]:
+    """
+    Свернуть новые сессии в строки сводки по (user_id, exercise_type).
+    Сессии — ORM-объекты или строки с id, user_id, exercise_type,
+    completed и created_at.
+    """
+    merged: dict[tuple, dict] = {}
+    for session in sessions:
+        key = (session.user_id, session.exercise_type)
+        row = merged.setdefault(
+            key,
+            {
+                "user_id": session.user_id,
+                "exercise_type": session.exercise_type,
+                "session_count": 0,
+                "completed_count": 0,
+                "last_session_id": session.id,
+                "last_session_at": session.created_at,
+            },
+        )
+        row["session_count"] += 1
+        row["completed_count"] += int(session.completed)
+        if (session.created_at, session.id) > (
+            row["last_session_at"],
+            row["last_session_id"],
+        ):
+            row["last_session_id"] = session.id
+            row["last_session_at"] = session.created_at
+    return list(merged.values())
+
+
+class UserWorkoutSummaryDAO(BaseDAO[UserWorkoutSummary]):
+    model = UserWorkoutSummary
+
+    async def record_sessions(self, sessions: Iterable) -> None:
+        """
+        Учесть новые сессии: прибавить счетчики и сдвинуть указатель
+        на последнюю сессию, если пришла более новая. Один upsert.
+        """
+        rows = merge_summary_rows(sessions)
+        if not rows:
+            return
+        summary = self.model
+        stmt = self.upsert_insert().values(rows)
+        excluded = stmt.excluded
+        is_newer = tuple_(
+            excluded.last_session_at, excluded.last_session_id
+        ) > tuple_(summary.last_session_at, summary.last_session_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "exercise_type"],
+            set_={
+                "session_count": summary.session_count
+                + excluded.session_count,
+                "completed_count": summary.completed_count
+                + excluded.completed_count,
+                "last_session_id": case(
+                    (is_newer, excluded.last_session_id),
+                    else_=summary.last_session_id,
+                ),
+                "last_session_at": case(
+                    (is_newer, excluded.last_session_at),
+                    else_=summary.last_session_at,
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def count_sessions(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+    ) -> int:
+        """Количество сессий пользователя по строкам сводки."""
+        stmt = select(
+            func.coalesce(func.sum(self.model.session_count), 0)
+        ).where(self.model.user_id == user_id)
+        if exercise_type:
+            stmt = stmt.where(self.model.exercise_type == exercise_type)
+        result = await self.session.execute(stmt)
+        return int(result.scalar_one())
+
+    async def get_last(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+    ) -> Row | None:
+        """Строка сводки с самой свежей последней сессией."""
+        filters = {"user_id": user_id}
+        if exercise_type:
+            filters["exercise_type"] = exercise_type
+        return await self.find_one_row(
+            columns=["last_session_id", "last_session_at", "updated_at"],
+            order_by=[
+                self.model.last_session_at.desc(),
+                self.model.last_session_id.desc(),
+            ],
+            **filters,
+        )
+
+    async def rebuild_for_users(self, first_id: int, last_id: int) -> int:
+        """
+        Пересчитать сводку пользователей first_id..last_id из сессий.
+        Блокировка та же, что и при пересборке rollup.
+        """
+        ws = WorkoutSession
+        await self.lock_for_rebuild()
+        await self.session.execute(
+            delete(self.model).where(
+                self.model.user_id.between(first_id, last_id)
+            )
+        )
+        per_exercise = {"partition_by": (ws.user_id, ws.exercise_type)}
+        # row_number вместо DISTINCT ON, чтобы запрос работал и в SQLite
+        numbered = (
+            select(
+                ws.user_id,
+                ws.exercise_type,
+                func.count().over(**per_exercise).label("session_count"),
+                func.count()
+                .filter(ws.completed.is_(True))
+                .over(**per_exercise)
+                .label("completed_count"),
+                ws.id,
+                ws.created_at,
+                func.row_number()
+                .over(
+                    **per_exercise,
+                    order_by=(ws.created_at.desc(), ws.id.desc()),
+                )
+                .label("position"),
+            )
+            .where(ws.user_id.between(first_id, last_id))
+            .subquery("numbered")
+        )
+        latest = select(
+            numbered.c.user_id,
+            numbered.c.exercise_type,
+            numbered.c.session_count,
+            numbered.c.completed_count,
+            numbered.c.id,
+            numbered.c.created_at,
+        ).where(numbered.c.position == 1)
+        result = await self.session.execute(
+            insert(self.model).from_select(
+                [
+                    "user_id",
+                    "exercise_type",
+                    "session_count",
+                    "completed_count",
+                    "last_session_id",
+                    "last_session_at",
+                ],
+                latest,
+            )
+        )
+        return result.rowcount
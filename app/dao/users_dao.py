@@ -1,9 +1,17 @@
-from sqlalchemy import or_
+from sqlalchemy import or_, delete, event
 
+from app.core.cache import user_cache
 from app.dao.base import BaseDAO
 from app.models.models import User
 
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Сбросить кэш при изменении пользователя через ORM."""
+    user_cache.invalidate(target.id)
+
+
 class UsersDAO(BaseDAO[User]):
     model = User
 
@@ -12,3 +20,24 @@ class UsersDAO(BaseDAO[User]):
         return await self.find_one(
             or_(User.email == login, User.username == login)
         )
+
+    async def update(self, *expressions, data: dict, **filters) -> list[User]:
+        """Обновить пользователей и сбросить их записи в кэше."""
+        users = await super().update(*expressions, data=data, **filters)
+        for user in users:
+            user_cache.invalidate(user.id)
+        return users
+
+    async def delete(self, *expressions, **filters) -> int:
+        """Удалить пользователей и сбросить их записи в кэше."""
+        stmt = (
+            delete(self.model)
+            .filter(*expressions)
+            .filter_by(**filters)
+            .returning(self.model.id)
+        )
+        result = await self.session.execute(stmt)
+        user_ids = result.scalars().all()
+        for user_id in user_ids:
+            user_cache.invalidate(user_id)
+        return len(user_ids)
@@ -1,6 +1,18 @@
-from sqlalchemy import select
+from datetime import datetime
+
+from sqlalchemy import Integer, and_, cast, func, select, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncResult
+from sqlalchemy.orm import aliased
 from app.dao.base import BaseDAO
-from app.models.models import ExerciseType, WorkoutSession
+from app.dao.sql import day_of
+from app.models.models import (
+    ExerciseType,
+    UserProgress,
+    UserWorkoutSummary,
+    WorkoutDailyRollup,
+    WorkoutSession,
+)
 
 
 class WorkoutSessionsDAO(BaseDAO[WorkoutSession]):
@@ -11,9 +23,9 @@ class WorkoutSessionsDAO(BaseDAO[WorkoutSession]):
         user_id: int,
         limit: int,
         offset: int,
-    ) -> list[WorkoutSession]:
+    ) -> list[Row]:
         """Получить сессии пользователя в хронологическом порядке."""
-        return await self.list(
+        return await self.list_rows(
             user_id=user_id,
             order_by=self.model.created_at.desc(),
             limit=limit,
@@ -26,9 +38,9 @@ class WorkoutSessionsDAO(BaseDAO[WorkoutSession]):
         exercise_type: ExerciseType,
         limit: int,
         offset: int,
-    ) -> list[WorkoutSession]:
+    ) -> list[Row]:
         """Получить сессии по определенному упражнению."""
-        return await self.list(
+        return await self.list_rows(
             user_id=user_id,
             exercise_type=exercise_type,
             order_by=self.model.created_at.desc(),
@@ -36,19 +48,148 @@ class WorkoutSessionsDAO(BaseDAO[WorkoutSession]):
             offset=offset,
         )
 
-    async def get_last_session(
+    async def list_by_user_keyset(
         self,
         user_id: int,
+        limit: int,
         exercise_type: ExerciseType | None = None,
-    ) -> WorkoutSession | None:
-        """Получить последнюю сессию тренировки."""
+        after: tuple[datetime, int] | None = None,
+        before: tuple[datetime, int] | None = None,
+    ) -> list[Row]:
+        """
+        Получить страницу сессий по ключу (created_at, id) без OFFSET.
+        after — более старые записи, before — более новые.
+        Результат всегда отсортирован от новых к старым.
+        """
         filters = {"user_id": user_id}
         if exercise_type:
             filters["exercise_type"] = exercise_type
-        return await self.find_one(
-            **filters, order_by=self.model.created_at.desc()
+        key = tuple_(self.model.created_at, self.model.id)
+
+        if before is not None:
+            items = await self.list_rows(
+                key > tuple_(*before),
+                order_by=[self.model.created_at.asc(), self.model.id.asc()],
+                limit=limit,
+                **filters,
+            )
+            return items[::-1]
+
+        expressions = [key < tuple_(*after)] if after is not None else []
+        return await self.list_rows(
+            *expressions,
+            order_by=[self.model.created_at.desc(), self.model.id.desc()],
+            limit=limit,
+            **filters,
         )
 
+    EXPORT_COLUMNS = (
+        "id",
+        "exercise_type",
+        "difficulty",
+        "reps_per_set_at_start",
+        "completed",
+        "notes",
+        "created_at",
+        "updated_at",
+    )
+
+    async def stream_by_user(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+        yield_per: int = 1000,
+    ) -> AsyncResult[Row]:
+        """
+        Открыть серверный курсор по всем сессиям пользователя.
+        Строки без ORM-объектов, от старых к новым, пачками по yield_per.
+        """
+        columns = [getattr(self.model, name) for name in self.EXPORT_COLUMNS]
+        stmt = (
+            select(*columns)
+            .where(self.model.user_id == user_id)
+            .order_by(self.model.created_at.asc(), self.model.id.asc())
+            .execution_options(yield_per=yield_per)
+        )
+        if exercise_type:
+            stmt = stmt.where(self.model.exercise_type == exercise_type)
+        return await self.session.stream(stmt)
+
+    async def stats_by_user(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+        recent_window: int = 10,
+    ) -> list[Row]:
+        """
+        Агрегаты по упражнениям одним запросом.
+        row_number() нумерует сессии от новых к старым внутри упражнения,
+        чтобы посчитать выполнение за последние recent_window тренировок.
+        """
+        ws = self.model
+        numbered = select(
+            ws.exercise_type,
+            ws.completed,
+            ws.reps_per_set_at_start,
+            ws.created_at,
+            func.row_number()
+            .over(
+                partition_by=ws.exercise_type,
+                order_by=(ws.created_at.desc(), ws.id.desc()),
+            )
+            .label("rn"),
+        ).where(ws.user_id == user_id)
+        if exercise_type:
+            numbered = numbered.where(ws.exercise_type == exercise_type)
+        numbered = numbered.subquery("numbered")
+
+        completed = numbered.c.completed.is_(True)
+        recent = numbered.c.rn <= recent_window
+        stmt = (
+            select(
+                numbered.c.exercise_type,
+                func.count().label("total_sessions"),
+                func.count().filter(completed).label("completed_sessions"),
+                func.avg(numbered.c.reps_per_set_at_start).label("avg_reps"),
+                func.max(numbered.c.reps_per_set_at_start)
+                .filter(completed)
+                .label("best_reps"),
+                func.max(numbered.c.created_at)
+                .filter(completed)
+                .label("last_success_at"),
+                func.count().filter(recent).label("recent_sessions"),
+                func.count()
+                .filter(and_(recent, completed))
+                .label("recent_completed"),
+            )
+            .group_by(numbered.c.exercise_type)
+            .order_by(numbered.c.exercise_type)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.all())
+
+    async def list_last_per_exercise(self, user_id: int) -> list[Row]:
+        """
+        Последняя сессия по каждому упражнению пользователя. Указатели
+        берутся из сводки, поэтому это поиск по первичным ключам, а не
+        DISTINCT ON по всей истории.
+        """
+        stmt = (
+            select(*self._columns())
+            .join(
+                UserWorkoutSummary,
+                UserWorkoutSummary.last_session_id == self.model.id,
+            )
+            .where(UserWorkoutSummary.user_id == user_id)
+            .order_by(UserWorkoutSummary.exercise_type)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.all())
+
+    async def get_row_by_id(self, session_id: int) -> Row | None:
+        """Получить сессию по первичному ключу без загрузки ORM."""
+        return await self.find_one_row(id=session_id)
+
     async def get_by_id_and_user(
         self,
         session_id: int,
@@ -65,3 +206,153 @@ class WorkoutSessionsDAO(BaseDAO[WorkoutSession]):
     async def create_session(self, **data) -> WorkoutSession:
         """Создать новую сессию тренировки."""
         return await self.create(**data)
+
+    async def finish_with_progress(
+        self,
+        session_id: int,
+        user_id: int,
+        completed: bool,
+        notes: str | None = None,
+    ) -> WorkoutSession | None:
+        """
+        Завершить сессию и повысить прогресс одним запросом.
+        UPDATE сессии, прогресса, дневного rollup и сводки объединены
+        в CTE, поэтому два параллельных завершения не теряют повышение
+        уровня.
+        """
+        if self.dialect_name == "sqlite":
+            return await self._finish_sequentially(
+                session_id, user_id, completed, notes
+            )
+        # Состояние до завершения нужно, чтобы сдвинуть счетчики rollup
+        previous = (
+            select(self.model.id, self.model.completed)
+            .where(
+                self.model.id == session_id,
+                self.model.user_id == user_id,
+            )
+            .with_for_update()
+            .cte("previous")
+        )
+        finished = (
+            update(self.model)
+            .where(self.model.id == previous.c.id)
+            .values(completed=completed, notes=notes)
+            .returning(*self.model.__table__.c)
+            .cte("finished")
+        )
+        delta = cast(finished.c.completed, Integer) - cast(
+            previous.c.completed, Integer
+        )
+        rolled = (
+            update(WorkoutDailyRollup)
+            .where(
+                WorkoutDailyRollup.user_id == finished.c.user_id,
+                WorkoutDailyRollup.exercise_type == finished.c.exercise_type,
+                WorkoutDailyRollup.day == day_of(finished.c.created_at),
+                previous.c.id == finished.c.id,
+            )
+            .values(
+                completed=WorkoutDailyRollup.completed + delta,
+                failed=WorkoutDailyRollup.failed - delta,
+                reps_sum=WorkoutDailyRollup.reps_sum
+                + delta * finished.c.reps_per_set_at_start,
+            )
+            .returning(WorkoutDailyRollup.day)
+            .cte("rolled")
+        )
+        summarized = (
+            update(UserWorkoutSummary)
+            .where(
+                UserWorkoutSummary.user_id == finished.c.user_id,
+                UserWorkoutSummary.exercise_type == finished.c.exercise_type,
+                previous.c.id == finished.c.id,
+            )
+            .values(
+                completed_count=UserWorkoutSummary.completed_count + delta,
+                updated_at=func.now(),
+            )
+            .returning(UserWorkoutSummary.user_id)
+            .cte("summarized")
+        )
+        progressed = (
+            update(UserProgress)
+            .where(
+                UserProgress.user_id == finished.c.user_id,
+                UserProgress.exercise_type == finished.c.exercise_type,
+                finished.c.completed.is_(True),
+            )
+            .values(**UserProgress.level_up_values())
+            .returning(UserProgress.id)
+            .cte("progressed")
+        )
+        stmt = (
+            select(aliased(self.model, finished))
+            .add_cte(progressed, rolled, summarized)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def _finish_sequentially(
+        self,
+        session_id: int,
+        user_id: int,
+        completed: bool,
+        notes: str | None,
+    ) -> WorkoutSession | None:
+        """
+        То же завершение для SQLite, где UPDATE в CTE не поддерживается.
+        Запросы идут по очереди в транзакции единственного писателя,
+        поэтому параллельное завершение между ними не вклинится.
+        """
+        previous = await self.find_one_row(
+            columns=["completed"], id=session_id, user_id=user_id
+        )
+        if previous is None:
+            return None
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id == session_id)
+            .values(completed=completed, notes=notes)
+            .execution_options(synchronize_session=False)
+        )
+        session = await self.session.get(
+            self.model, session_id, populate_existing=True
+        )
+        delta = int(completed) - int(previous.completed)
+        await self.session.execute(
+            update(WorkoutDailyRollup)
+            .where(
+                WorkoutDailyRollup.user_id == user_id,
+                WorkoutDailyRollup.exercise_type == session.exercise_type,
+                WorkoutDailyRollup.day == session.created_at.date(),
+            )
+            .values(
+                completed=WorkoutDailyRollup.completed + delta,
+                failed=WorkoutDailyRollup.failed - delta,
+                reps_sum=WorkoutDailyRollup.reps_sum
+                + delta * session.reps_per_set_at_start,
+            )
+        )
+        await self.session.execute(
+            update(UserWorkoutSummary)
+            .where(
+                UserWorkoutSummary.user_id == user_id,
+                UserWorkoutSummary.exercise_type == session.exercise_type,
+            )
+            .values(
+                completed_count=UserWorkoutSummary.completed_count + delta,
+                updated_at=func.now(),
+            )
+        )
+        if completed:
+            await self.session.execute(
+                update(UserProgress)
+                .where(
+                    UserProgress.user_id == user_id,
+                    UserProgress.exercise_type == session.exercise_type,
+                )
+                .values(**UserProgress.level_up_values())
+            )
+        return session
@@ -1,11 +1,37 @@
+from contextlib import asynccontextmanager
+
 import fastapi
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.database import dispose_engines, init_schema, pool_status
+from app.core.metrics import (
+    MetricsMiddleware,
+    RequestContextMiddleware,
+    render_metrics,
+)
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.security import password_hasher
+from app.core.serialization import ORJSONResponse
 from app.routers.auth import router as users_router
+from app.routers.dashboard import router as dashboard_router
+from app.routers.stats import router as stats_router
 from app.routers.user_progress import router as user_progress_router
 from app.routers.workout_session import router as workout_session_router
 
 
-app = fastapi.FastAPI()
+@asynccontextmanager
+async def lifespan(app: fastapi.FastAPI):
+    if settings.db.DB_BACKEND == "sqlite":
+        await init_schema()
+    yield
+    password_hasher.shutdown()
+    await dispose_engines()
+
+
+app = fastapi.FastAPI(
+    lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 # Enable CORS for frontend (supports dev and docker environments)
 app.add_middleware(
@@ -25,9 +51,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Режим читается на каждом запросе, чтобы тесты могли его включить
+app.add_middleware(QueryBudgetMiddleware)
+
+# Последним, чтобы замер охватывал и остальные middleware
+if settings.observability.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+elif settings.db.DB_SLOW_QUERY_MS > 0:
+    # Без метрик маршрут для лога медленных запросов ставит она
+    app.add_middleware(RequestContextMiddleware)
+
 app.include_router(users_router)
 app.include_router(user_progress_router)
 app.include_router(workout_session_router)
+app.include_router(stats_router)
+app.include_router(dashboard_router)
 
 
 @app.get("/")
@@ -35,6 +73,21 @@ async def root(request: fastapi.Request):
     return request.headers
 
 
+@app.get("/health/db-pool")
+async def db_pool_status():
+    """Статистика пула соединений: выдачи, ожидание, переполнение."""
+    return pool_status()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return PlainTextResponse(
+        render_metrics(pool_status()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
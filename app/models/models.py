@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import enum
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Annotated
 
 
@@ -10,8 +10,14 @@ from sqlalchemy import (
     String,
     CheckConstraint,
     UniqueConstraint,
+    Index,
+    and_,
+    case,
+    desc,
     func,
+    literal,
     Enum as SQLEnum,
+    Date,
     DateTime,
 )
 
@@ -144,10 +150,54 @@ class UserProgress(Base):
         ),
     )
 
-    def up_level(self) -> None:
-        """Увеличивает количество повторений на 1"""
+    def up_level(self, at: datetime | None = None) -> None:
+        """
+        Увеличивает количество повторений на 1. last_success_at не
+        откатывается назад: офлайн-тренировка может быть старше него.
+        """
         self.current_reps_per_set += 1
-        self.last_success_at = datetime.now(timezone.utc)
+        at = at or datetime.now(timezone.utc)
+        last = self.last_success_at
+        # SQLite возвращает время без таймзоны, оно в UTC
+        if last is not None and last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)
+        if last is None or at > last:
+            self.last_success_at = at
+
+    @classmethod
+    def level_up_values(cls) -> dict:
+        """
+        SQL-версия up_level() и try_upgrade_difficulty() для UPDATE.
+        Все выражения читают значения строки до обновления.
+        """
+        next_reps = cls.current_reps_per_set + 1
+        intermediate_start = Difficulty.INTERMEDIATE.get_reps_range()[0]
+        advanced_start = Difficulty.ADVANCED.get_reps_range()[0]
+        to_intermediate = and_(
+            cls.difficulty == Difficulty.BEGINNER,
+            next_reps >= intermediate_start,
+        )
+        to_advanced = and_(
+            cls.difficulty == Difficulty.INTERMEDIATE,
+            next_reps >= advanced_start,
+        )
+        difficulty_type = cls.__table__.c.difficulty.type
+        return {
+            "difficulty": case(
+                (
+                    to_intermediate,
+                    literal(Difficulty.INTERMEDIATE, difficulty_type),
+                ),
+                (to_advanced, literal(Difficulty.ADVANCED, difficulty_type)),
+                else_=cls.difficulty,
+            ),
+            "current_reps_per_set": case(
+                (to_intermediate, intermediate_start),
+                (to_advanced, advanced_start),
+                else_=next_reps,
+            ),
+            "last_success_at": func.now(),
+        }
 
     def get_starting_reps(self) -> int:
         """Возвращает стартовое количество повторений для текущего уровня"""
@@ -226,6 +276,19 @@ class WorkoutSession(Base):
 
     __table_args__ = (
         CheckConstraint("reps_per_set_at_start >= 1", name="check_start_reps"),
+        Index(
+            "ix_workout_sessions_user_created",
+            "user_id",
+            desc("created_at"),
+            desc("id"),
+        ),
+        Index(
+            "ix_workout_sessions_user_exercise_created",
+            "user_id",
+            "exercise_type",
+            desc("created_at"),
+            desc("id"),
+        ),
     )
 
     def __repr__(self) -> str:
@@ -235,3 +298,69 @@ class WorkoutSession(Base):
             f"completed={self.completed}, "
             f"reps_at_start={self.reps_per_set_at_start})"
         )
+
+
+class WorkoutDailyRollup(Base):
+    """
+    Дневные счетчики тренировок пользователя по упражнению.
+    Обновляются в той же транзакции, что и сессии.
+    """
+
+    __tablename__ = "workout_daily_rollup"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"), primary_key=True
+    )
+    exercise_type: Mapped[ExerciseType] = mapped_column(
+        SQLEnum(ExerciseType, name="exercise_type_enum"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    started: Mapped[int] = mapped_column(default=0, server_default="0")
+    completed: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Не выполненные сессии ("сдулся"), включая еще не завершенные
+    failed: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Сумма повторов в подходе по выполненным сессиям
+    reps_sum: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return (
+            f"WorkoutDailyRollup(user_id={self.user_id}, "
+            f"exercise={self.exercise_type.value}, "
+            f"day={self.day}, started={self.started}, "
+            f"completed={self.completed})"
+        )
+
+
+class UserWorkoutSummary(Base):
+    """
+    Сводка по сессиям пользователя в разрезе упражнения: счетчики и
+    указатель на последнюю сессию. Обновляется вместе с сессиями.
+    """
+
+    __tablename__ = "user_workout_summary"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"), primary_key=True
+    )
+    exercise_type: Mapped[ExerciseType] = mapped_column(
+        SQLEnum(ExerciseType, name="exercise_type_enum"),
+        primary_key=True,
+    )
+    session_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    completed_count: Mapped[int] = mapped_column(
+        default=0, server_default="0"
+    )
+    last_session_id: Mapped[int] = mapped_column(
+        ForeignKey("workout_sessions.id")
+    )
+    last_session_at: Mapped[datetime]
+    updated_at: Mapped[updated_at]
+
+    def __repr__(self) -> str:
+        return (
+            f"UserWorkoutSummary(user_id={self.user_id}, "
+            f"exercise={self.exercise_type.value}, "
+            f"sessions={self.session_count}, "
+            f"last_session_id={self.last_session_id})"
+        )
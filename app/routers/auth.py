@@ -5,7 +5,9 @@ from app.schemas.users import UserCreateSchema
 from app.services.user_service import UserService
 from app.core.security import get_current_user
 from app.core.database import get_session
-from app.schemas.users import TokenResponse
+from app.core.query_budget import query_budget
+from app.core.serialization import ORJSONResponse, orm_response
+from app.schemas.users import TokenResponse, UserReadSchema
 
 
 async def get_user_service(session: AsyncSession = Depends(get_session)):
@@ -16,6 +18,7 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
+@query_budget(2)
 async def register_user(
     user_data: UserCreateSchema,
     service: UserService = Depends(get_user_service),
@@ -26,6 +29,7 @@ async def register_user(
 
 
 @router.post("/login", response_model=TokenResponse)
+@query_budget(1)
 async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(),
     service: UserService = Depends(get_user_service),
@@ -41,7 +45,11 @@ async def login_user(
     }
 
 
-@router.get("/me")
-async def read_users_me(current_user=Depends(get_current_user)):
+@router.get("/me", response_model=UserReadSchema)
+@query_budget(1)
+async def read_users_me(
+    current_user=Depends(get_current_user),
+) -> ORJSONResponse:
     """Получить информацию о текущем пользователе."""
-    return current_user
+    # Через схему: ORM-объект целиком отдал бы и хеш пароля
+    return orm_response(UserReadSchema, current_user)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_budget import query_budget
+from app.core.security import get_current_user, get_user_read_session
+from app.core.serialization import ORJSONResponse, orm_response
+from app.models.models import User
+from app.schemas.dashboard import DashboardSchema
+from app.services.dashboard_service import DashboardService
+
+router = APIRouter(prefix="/me", tags=["Дашборд"])
+
+
+async def get_dashboard_service(
+    read_session: AsyncSession = Depends(get_user_read_session),
+) -> DashboardService:
+    return DashboardService(read_session)
+
+
+@router.get("/dashboard", response_model=DashboardSchema)
+@query_budget(3)
+async def get_dashboard(
+    current_user: User = Depends(get_current_user),
+    service: DashboardService = Depends(get_dashboard_service),
+) -> ORJSONResponse:
+    """Все данные главного экрана одним ответом."""
+    dashboard = await service.get_dashboard(current_user)
+    return orm_response(DashboardSchema, dashboard)
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_budget import query_budget
+from app.core.security import get_current_principal, get_read_session
+from app.core.serialization import ORJSONResponse, orm_response
+from app.models.models import ExerciseType
+from app.schemas.stats import DailyRollupSchema, ExerciseStatsSchema
+from app.schemas.users import PrincipalSchema
+from app.services.stats_service import StatsService
+
+router = APIRouter(prefix="/stats", tags=["Статистика"])
+
+
+async def get_stats_service(
+    read_session: AsyncSession = Depends(get_read_session),
+) -> StatsService:
+    return StatsService(read_session)
+
+
+@router.get("/", response_model=list[ExerciseStatsSchema])
+@query_budget(2)
+async def get_stats(
+    exercise_type: ExerciseType | None = Query(
+        None, description="Тип упражнения"
+    ),
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: StatsService = Depends(get_stats_service),
+) -> ORJSONResponse:
+    """Статистика по упражнениям: выполнение, повторы, последний успех."""
+    stats = await service.get_exercise_stats(
+        user_id=current_user.id,
+        exercise_type=exercise_type,
+    )
+    return orm_response(list[ExerciseStatsSchema], stats)
+
+
+@router.get("/calendar", response_model=list[DailyRollupSchema])
+@query_budget(2)
+async def get_calendar(
+    days: int = Query(30, ge=1, le=366, description="Сколько дней назад"),
+    exercise_type: ExerciseType | None = Query(
+        None, description="Тип упражнения"
+    ),
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: StatsService = Depends(get_stats_service),
+) -> ORJSONResponse:
+    """Календарь тренировок: счетчики по дням и упражнениям."""
+    rows = await service.get_calendar(
+        user_id=current_user.id,
+        days=days,
+        exercise_type=exercise_type,
+    )
+    return orm_response(list[DailyRollupSchema], rows)
@@ -1,56 +1,87 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_session
+from app.core.http_cache import conditional_response
+from app.core.query_budget import query_budget
+from app.core.serialization import ORJSONResponse, orm_response
 from app.schemas.user_progress import (
     UserProgressCreateSchema,
     UserProgressReadSchema,
 )
 from app.services.user_progress_service import UserProgressService
-from app.core.security import get_current_user
+from app.core.security import (
+    get_current_user,
+    get_current_principal,
+    get_read_session,
+)
 from app.models.models import User, ExerciseType
+from app.schemas.users import PrincipalSchema
 
 router = APIRouter(prefix="/progress", tags=["Прогресс пользователя"])
 
 
-async def get_progress_service(session: AsyncSession = Depends(get_session)):
+async def get_progress_service(
+    session: AsyncSession = Depends(get_session),
+):
+    """Сервис для записи: только primary, без разбора principal."""
     return UserProgressService(session)
 
 
+async def get_progress_read_service(
+    session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+):
+    """Сервис для чтения: читающие методы могут идти в реплику."""
+    return UserProgressService(session, read_session)
+
+
 @router.get("/", response_model=list[UserProgressReadSchema])
+@query_budget(3)
 async def get_user_progress(
-    current_user: User = Depends(get_current_user),
-    service: UserProgressService = Depends(get_progress_service),
-):
+    request: Request,
+    response: Response,
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: UserProgressService = Depends(get_progress_read_service),
+) -> ORJSONResponse:
     """Получить весь прогресс пользователя по упражнениям."""
-    return await service.get_user_progress(user_id=current_user.id)
+    etag, last_modified = await service.get_progress_etag(current_user.id)
+    not_modified = conditional_response(
+        request, response, etag, last_modified
+    )
+    if not_modified:
+        return not_modified
+    progress = await service.get_user_progress(user_id=current_user.id)
+    return orm_response(
+        list[UserProgressReadSchema], progress, headers=response.headers
+    )
 
 
 @router.get("/by-exercise", response_model=UserProgressReadSchema | None)
+@query_budget(3)
 async def get_progress_for_exercise(
     exercise_type: ExerciseType = Query(..., description="Тип упражнения"),
-    current_user: User = Depends(get_current_user),
-    service: UserProgressService = Depends(get_progress_service),
-) -> UserProgressReadSchema | None:
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: UserProgressService = Depends(get_progress_read_service),
+) -> ORJSONResponse:
     """Получить прогресс пользователя для конкретного упражнения."""
-    session = await service.get_progress_for_exercise(
+    progress = await service.get_progress_for_exercise(
         user_id=current_user.id,
         exercise_type=exercise_type,
     )
-    if session:
-        return UserProgressReadSchema.model_validate(session)
-    return None
+    return orm_response(UserProgressReadSchema | None, progress)
 
 
 @router.post("/", response_model=UserProgressReadSchema)
+@query_budget(3)
 async def create_progress(
     data: UserProgressCreateSchema,
     current_user: User = Depends(get_current_user),
     service: UserProgressService = Depends(get_progress_service),
-):
+) -> ORJSONResponse:
     """Создать новый прогресс для упражнения."""
     progress = await service.create_progress(
         user_id=current_user.id,
         exercise_type=data.exercise_type,
         reps=data.current_reps_per_set,
     )
-    return UserProgressReadSchema.model_validate(progress)
+    return orm_response(UserProgressReadSchema, progress)
@@ -1,55 +1,110 @@
-from fastapi import APIRouter, Depends, status, Query
+from typing import Literal
+
+from fastapi import APIRouter, Depends, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_session
-from app.core.security import get_current_user
+from app.core.http_cache import conditional_response
+from app.core.query_budget import query_budget
+from app.core.serialization import ORJSONResponse, orm_response
+from app.core.security import (
+    get_current_user,
+    get_current_principal,
+    get_read_session,
+)
 from app.models.models import ExerciseType, User
 from app.schemas.workout_session import (
     WorkoutSessionStartSchema,
     WorkoutSessionReadSchema,
     PaginatedResponse,
+    CursorPaginatedResponse,
     WorkoutSessionUpdateSchema,
+    WorkoutSessionBatchSchema,
+    WorkoutSessionBatchResultSchema,
 )
+from app.schemas.users import PrincipalSchema
 from app.services.workout_session_service import WorkoutSessionService
 
 
 router = APIRouter(prefix="/sessions", tags=["Воркаут сессии"])
 
+PaginationMode = Literal["offset", "cursor"]
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
 
 async def get_workout_session_service(
     session: AsyncSession = Depends(get_session),
 ) -> WorkoutSessionService:
+    """Сервис для записи: только primary, без разбора principal."""
     return WorkoutSessionService(session)
 
 
+async def get_workout_session_read_service(
+    session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+) -> WorkoutSessionService:
+    """Сервис для чтения: читающие методы могут идти в реплику."""
+    return WorkoutSessionService(session, read_session)
+
+
 @router.post(
     "/start",
     response_model=WorkoutSessionReadSchema,
     status_code=status.HTTP_201_CREATED,
 )
+@query_budget(5)
 async def start_workout_session(
     data: WorkoutSessionStartSchema,
     current_user: User = Depends(get_current_user),
     service: WorkoutSessionService = Depends(get_workout_session_service),
-) -> WorkoutSessionReadSchema:
+) -> ORJSONResponse:
     """Начать новую сессию тренировки."""
     session = await service.start_session(
         user_id=current_user.id,
         exercise_type=data.exercise_type,
     )
-    return WorkoutSessionReadSchema.model_validate(session)
+    return orm_response(
+        WorkoutSessionReadSchema, session, status.HTTP_201_CREATED
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=WorkoutSessionBatchResultSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+async def ingest_workout_sessions(
+    data: WorkoutSessionBatchSchema,
+    current_user: User = Depends(get_current_user),
+    service: WorkoutSessionService = Depends(get_workout_session_service),
+) -> ORJSONResponse:
+    """Загрузить пачку тренировок, выполненных офлайн."""
+    result = await service.ingest_batch(
+        user_id=current_user.id,
+        items=data.items,
+    )
+    return orm_response(
+        WorkoutSessionBatchResultSchema, result, status.HTTP_201_CREATED
+    )
 
 
 @router.patch(
     "/{session_id}/finish",
     response_model=WorkoutSessionReadSchema,
 )
+@query_budget(7)
 async def finish_workout_session(
     session_id: int,
     data: WorkoutSessionUpdateSchema,
     current_user: User = Depends(get_current_user),
     service: WorkoutSessionService = Depends(get_workout_session_service),
-) -> WorkoutSessionReadSchema:
+) -> ORJSONResponse:
     """Завершить сессию тренировки и обновить прогресс."""
     session = await service.finish_session(
         session_id=session_id,
@@ -57,67 +112,162 @@ async def finish_workout_session(
         completed=data.completed,
         notes=data.notes,
     )
-    return WorkoutSessionReadSchema.model_validate(session)
+    return orm_response(WorkoutSessionReadSchema, session)
 
 
 @router.get(
     "/",
-    response_model=PaginatedResponse[WorkoutSessionReadSchema],
+    response_model=PaginatedResponse[WorkoutSessionReadSchema]
+    | CursorPaginatedResponse[WorkoutSessionReadSchema],
 )
+@query_budget(3)
 async def get_sessions(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
     page: int = Query(1, ge=1, description="Номер страницы"),
     size: int = Query(10, ge=1, le=100, description="Размер страницы"),
-    service: WorkoutSessionService = Depends(get_workout_session_service),
-) -> PaginatedResponse[WorkoutSessionReadSchema]:
+    pagination: PaginationMode = Query(
+        "offset", description="Режим пагинации: offset или cursor"
+    ),
+    after: str | None = Query(None, description="Курсор: более старые"),
+    before: str | None = Query(None, description="Курсор: более новые"),
+    include_total: bool = Query(
+        False, description="Считать общее количество в режиме cursor"
+    ),
+    service: WorkoutSessionService = Depends(
+        get_workout_session_read_service
+    ),
+) -> ORJSONResponse:
     """Получить все сессии тренировок пользователя с пагинацией."""
+    if pagination == "cursor" or after or before:
+        cursor_data = await service.get_sessions_by_cursor(
+            user_id=current_user.id,
+            size=size,
+            after=after,
+            before=before,
+            include_total=include_total,
+        )
+        return orm_response(
+            CursorPaginatedResponse[WorkoutSessionReadSchema], cursor_data
+        )
+
     data_dict = await service.get_user_sessions_paginated(
         user_id=current_user.id,
         page=page,
         size=size,
     )
-    # Хз нужно или нет вручную валидировать если FastAPI уже это делает
-    return PaginatedResponse[WorkoutSessionReadSchema](**data_dict)
+    return orm_response(
+        PaginatedResponse[WorkoutSessionReadSchema], data_dict
+    )
 
 
 @router.get(
     "/by-exercise",
-    response_model=PaginatedResponse[WorkoutSessionReadSchema],
+    response_model=PaginatedResponse[WorkoutSessionReadSchema]
+    | CursorPaginatedResponse[WorkoutSessionReadSchema],
 )
+@query_budget(3)
 async def get_sessions_by_exercise(
     exercise_type: ExerciseType = Query(..., description="Тип упражнения"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     size: int = Query(10, ge=1, le=100, description="Размер страницы"),
-    current_user: User = Depends(get_current_user),
-    service: WorkoutSessionService = Depends(get_workout_session_service),
-) -> PaginatedResponse[WorkoutSessionReadSchema]:
+    pagination: PaginationMode = Query(
+        "offset", description="Режим пагинации: offset или cursor"
+    ),
+    after: str | None = Query(None, description="Курсор: более старые"),
+    before: str | None = Query(None, description="Курсор: более новые"),
+    include_total: bool = Query(
+        False, description="Считать общее количество в режиме cursor"
+    ),
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: WorkoutSessionService = Depends(
+        get_workout_session_read_service
+    ),
+) -> ORJSONResponse:
     """Получить сессии по конкретному упражнению с пагинацией."""
+    if pagination == "cursor" or after or before:
+        cursor_data = await service.get_sessions_by_cursor(
+            user_id=current_user.id,
+            size=size,
+            exercise_type=exercise_type,
+            after=after,
+            before=before,
+            include_total=include_total,
+        )
+        return orm_response(
+            CursorPaginatedResponse[WorkoutSessionReadSchema], cursor_data
+        )
+
     dict_data = await service.get_sessions_by_exercise_paginated(
         user_id=current_user.id,
         exercise_type=exercise_type,
         page=page,
         size=size,
     )
-    # Хз нужно или нет вручную валидировать если FastAPI уже это делает
-    return PaginatedResponse[WorkoutSessionReadSchema](**dict_data)
+    return orm_response(
+        PaginatedResponse[WorkoutSessionReadSchema], dict_data
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_sessions(
+    export_format: ExportFormat = Query(
+        "ndjson", alias="format", description="Формат: ndjson или csv"
+    ),
+    exercise_type: ExerciseType | None = Query(
+        None, description="Тип упражнения"
+    ),
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: WorkoutSessionService = Depends(
+        get_workout_session_read_service
+    ),
+) -> StreamingResponse:
+    """Выгрузить всю историю тренировок потоком."""
+    return StreamingResponse(
+        service.export_sessions(
+            user_id=current_user.id,
+            export_format=export_format,
+            exercise_type=exercise_type,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="sessions.{export_format}"'
+            )
+        },
+    )
 
 
 @router.get(
     "/last",
     response_model=WorkoutSessionReadSchema | None,
 )
+@query_budget(4)
 async def get_last_session(
+    request: Request,
+    response: Response,
     exercise_type: ExerciseType | None = Query(
         None, description="Тип упражнения"
     ),
-    current_user: User = Depends(get_current_user),
-    service: WorkoutSessionService = Depends(get_workout_session_service),
-) -> WorkoutSessionReadSchema | None:
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    service: WorkoutSessionService = Depends(
+        get_workout_session_read_service
+    ),
+) -> ORJSONResponse:
+    etag, last_modified = await service.get_last_session_etag(
+        user_id=current_user.id,
+        exercise_type=exercise_type,
+    )
+    not_modified = conditional_response(
+        request, response, etag, last_modified
+    )
+    if not_modified:
+        return not_modified
     session_model = await service.get_last_session(
         user_id=current_user.id,
         exercise_type=exercise_type,
     )
-    if not session_model:
-        return None
-    # Хз нужно или нет вручную валидировать если FastAPI уже это делает
-    return WorkoutSessionReadSchema.model_validate(session_model)
+    return orm_response(
+        WorkoutSessionReadSchema | None,
+        session_model,
+        headers=response.headers,
+    )
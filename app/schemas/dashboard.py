@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from app.schemas.user_progress import UserProgressReadSchema
+from app.schemas.users import UserReadSchema
+from app.schemas.workout_session import WorkoutSessionReadSchema
+
+
+class DashboardSchema(BaseModel):
+    user: UserReadSchema
+    progress: list[UserProgressReadSchema]
+    # Последняя сессия по каждому упражнению, где они были
+    last_sessions: list[WorkoutSessionReadSchema]
@@ -0,0 +1,25 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+from app.schemas.base import BaseSchema
+from app.models.models import ExerciseType as ExerciseTypeEnum
+
+
+class ExerciseStatsSchema(BaseModel):
+    exercise_type: ExerciseTypeEnum
+    total_sessions: int
+    completed_sessions: int
+    completion_rate: float
+    recent_completion_rate: float  # по последним тренировкам
+    avg_reps: float
+    best_reps: int | None
+    last_success_at: datetime | None
+    seconds_since_last_success: int | None
+
+
+class DailyRollupSchema(BaseSchema):
+    day: date
+    exercise_type: ExerciseTypeEnum
+    started: int
+    completed: int
+    failed: int
+    reps_sum: int
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from app.schemas.base import BaseSchema, TimestampSchema
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from app.schemas.base import BaseSchema
 
 
 class UserCreateSchema(BaseModel):
@@ -8,7 +8,7 @@ class UserCreateSchema(BaseModel):
     password: str
 
 
-class UserReadSchema(BaseSchema, TimestampSchema):
+class UserReadSchema(BaseSchema):
     id: int
     username: str
     email: str
@@ -18,3 +18,12 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     expires_in: int | None = None
+
+
+class PrincipalSchema(BaseModel):
+    """Аутентифицированный пользователь без загрузки ORM-модели."""
+
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    username: str
@@ -1,6 +1,8 @@
+from datetime import datetime
 from typing import Generic, TypeVar, List
 from pydantic import BaseModel, Field
 from app.schemas.base import BaseSchema, TimestampSchema
+from app.schemas.user_progress import UserProgressReadSchema
 from app.models.models import ExerciseType as ExerciseTypeEnum
 from app.models.models import Difficulty as DifficultyEnum
 
@@ -18,6 +20,16 @@ class PaginatedResponse(BaseSchema, Generic[T]):
     has_prev: bool
 
 
+class CursorPaginatedResponse(BaseSchema, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: str | None
+    prev_cursor: str | None
+    has_next: bool
+    has_prev: bool
+    total: int | None = None
+
+
 class WorkoutSessionReadSchema(BaseSchema, TimestampSchema):
     id: int
     user_id: int
@@ -35,3 +47,21 @@ class WorkoutSessionStartSchema(BaseModel):
 class WorkoutSessionUpdateSchema(BaseModel):
     completed: bool | None = None
     notes: str | None = Field(None, max_length=500)
+
+
+class WorkoutSessionBatchItemSchema(BaseModel):
+    exercise_type: ExerciseTypeEnum
+    completed: bool
+    notes: str | None = Field(None, max_length=500)
+    performed_at: datetime | None = None  # когда тренировка прошла офлайн
+
+
+class WorkoutSessionBatchSchema(BaseModel):
+    items: List[WorkoutSessionBatchItemSchema] = Field(
+        ..., min_length=1, max_length=500
+    )
+
+
+class WorkoutSessionBatchResultSchema(BaseSchema):
+    sessions: List[WorkoutSessionReadSchema]
+    progress: List[UserProgressReadSchema]
@@ -1,125 +1,324 @@
+"""
+Генератор тестовых данных для нагрузочного тестирования.
+
+Запуск:
+    python -m app.scripts.initial_data --users 100000 \\
+        --sessions-per-user 100 --days 365 --completion-ratio 0.67 --seed 1
+
+Все таблицы очищаются, затем строки пачками пользователей уходят в
+Postgres через COPY (asyncpg copy_records_to_table), в SQLite — пачечным
+INSERT. Прогресс считается в памяти по правилам UserProgress, поэтому
+он согласован с сессиями.
+Rollup и сводка пересобираются из сессий в той же транзакции.
+"""
+
+import argparse
 import asyncio
-from sqlalchemy import text
 import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
 
-from sqlalchemy.ext.asyncio import (
-    create_async_engine,
-    AsyncSession,
-)
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
-from app.core.config import settings
+from app.core.database import async_engine as engine, init_schema
+from app.core.security import get_password_hash
+from app.dao.rollup_dao import WorkoutDailyRollupDAO
+from app.dao.summary_dao import UserWorkoutSummaryDAO
 from app.models.models import (
+    Base,
+    Difficulty,
+    ExerciseType,
     User,
     UserProgress,
+    UserWorkoutSummary,
+    WorkoutDailyRollup,
     WorkoutSession,
-    ExerciseType,
-    Difficulty,
 )
-from app.core.security import get_password_hash
 
-# ---------------------------------------------------------
-# Async engine и фабрика сессий
-# ---------------------------------------------------------
+# Порядок колонок в записях для COPY
+USER_COLUMNS = ("id", "username", "email", "password")
+PROGRESS_COLUMNS = (
+    "id",
+    "user_id",
+    "exercise_type",
+    "difficulty",
+    "current_reps_per_set",
+    "last_success_at",
+    "created_at",
+    "updated_at",
+)
+SESSION_COLUMNS = (
+    "id",
+    "user_id",
+    "exercise_type",
+    "difficulty",
+    "reps_per_set_at_start",
+    "completed",
+    "notes",
+    "created_at",
+    "updated_at",
+)
+SEEDED_TABLES = (
+    User.__tablename__,
+    UserProgress.__tablename__,
+    WorkoutSession.__tablename__,
+)
+# Таблицы для ANALYZE: залитые и пересобранные из них rollup и сводка
+ANALYZED_TABLES = SEEDED_TABLES + (
+    WorkoutDailyRollup.__tablename__,
+    UserWorkoutSummary.__tablename__,
+)
 
-DATABASE_URL = settings.db.DATABASE_URL
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-)
+class SeedBatch(NamedTuple):
+    users: list[tuple]
+    progress: list[tuple]
+    sessions: list[tuple]
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
 
+def generate_batch(
+    rng: random.Random,
+    first_user_id: int,
+    user_count: int,
+    first_session_id: int,
+    sessions_per_user: int,
+    start: datetime,
+    days: int,
+    completion_ratio: float,
+    password_hash: str,
+) -> SeedBatch:
+    """
+    Сгенерировать записи для пользователей first_user_id.. подряд.
+    Сессии каждого пользователя упорядочены по времени, прогресс
+    проигрывается по ним так же, как при start/finish в сервисе.
+    """
+    exercises = list(ExerciseType)
+    span = days * 86400
+    batch = SeedBatch([], [], [])
+    session_id = first_session_id
+
+    for user_id in range(first_user_id, first_user_id + user_count):
+        batch.users.append(
+            (
+                user_id,
+                f"user_{user_id}",
+                f"user{user_id}@example.com",
+                password_hash,
+            )
+        )
+        # Объекты не попадают в сессию SQLAlchemy, нужны только их правила
+        progress_by_exercise = {
+            exercise: UserProgress(
+                exercise_type=exercise,
+                difficulty=Difficulty.BEGINNER,
+                current_reps_per_set=3,
+            )
+            for exercise in exercises
+        }
+        offsets = sorted(rng.random() * span for _ in range(sessions_per_user))
+        last_at = start
+        for offset in offsets:
+            exercise = rng.choice(exercises)
+            progress = progress_by_exercise[exercise]
+            completed = rng.random() < completion_ratio
+            created_at = start + timedelta(seconds=offset)
+            batch.sessions.append(
+                (
+                    session_id,
+                    user_id,
+                    exercise.name,
+                    progress.difficulty.name,
+                    progress.current_reps_per_set,
+                    completed,
+                    None,
+                    created_at,
+                    created_at,
+                )
+            )
+            session_id += 1
+            last_at = created_at
+            if completed:
+                progress.up_level(at=created_at.replace(tzinfo=timezone.utc))
+                progress.try_upgrade_difficulty()
+
+        # id прогресса однозначно выводится из id пользователя
+        first_progress_id = (user_id - 1) * len(exercises) + 1
+        for index, (exercise, progress) in enumerate(
+            progress_by_exercise.items()
+        ):
+            batch.progress.append(
+                (
+                    first_progress_id + index,
+                    user_id,
+                    exercise.name,
+                    progress.difficulty.name,
+                    progress.current_reps_per_set,
+                    progress.last_success_at,
+                    start,
+                    last_at,
+                )
+            )
+    return batch
+
+
+async def clear_tables(conn: AsyncConnection) -> None:
+    """Очистить все таблицы приложения."""
+    tables = Base.metadata.sorted_tables
+    if conn.dialect.name == "postgresql":
+        names = ", ".join(table.name for table in tables)
+        await conn.execute(
+            text(f"TRUNCATE TABLE {names} RESTART IDENTITY CASCADE")
+        )
+        return
+    # В SQLite нет TRUNCATE, DELETE без WHERE он делает так же быстро
+    for table in reversed(tables):
+        await conn.execute(table.delete())
+
+
+async def load_records(
+    conn: AsyncConnection,
+    model: type[Base],
+    records: list[tuple],
+    columns: tuple[str, ...],
+) -> None:
+    """Залить записи: COPY в PostgreSQL, пачечный INSERT в SQLite."""
+    if not records:
+        return
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            model.__tablename__, records=records, columns=columns
+        )
+        return
+    await conn.execute(
+        insert(model.__table__),
+        [dict(zip(columns, record)) for record in records],
+    )
 
-# ---------------------------------------------------------
-# Основная логика сидинга
-# ---------------------------------------------------------
 
+async def seed_data(
+    users: int = 6,
+    sessions_per_user: int = 10,
+    days: int = 30,
+    completion_ratio: float = 2 / 3,
+    seed: int | None = None,
+    batch_size: int = 1000,
+) -> None:
+    """Очистить базу и залить сгенерированные данные одной транзакцией."""
+    rng = random.Random(seed)
+    # Общий хеш для всех тестовых пользователей, bcrypt медленный
+    password_hash = get_password_hash("password123")
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=days
+    )
+    started = time.perf_counter()
+    if engine.dialect.name == "sqlite":
+        await init_schema(engine)
 
-async def seed_data() -> None:
-    async with AsyncSessionLocal() as db:
-        try:
-            # Автоматическая очистка перед заполнением
-            await db.execute(
+    async with engine.begin() as conn:
+        await clear_tables(conn)
+
+        session_id = 1
+        for first_id in range(1, users + 1, batch_size):
+            count = min(batch_size, users - first_id + 1)
+            batch = generate_batch(
+                rng,
+                first_id,
+                count,
+                session_id,
+                sessions_per_user,
+                start,
+                days,
+                completion_ratio,
+                password_hash,
+            )
+            session_id += len(batch.sessions)
+            await load_records(conn, User, batch.users, USER_COLUMNS)
+            await load_records(
+                conn, UserProgress, batch.progress, PROGRESS_COLUMNS
+            )
+            await load_records(
+                conn, WorkoutSession, batch.sessions, SESSION_COLUMNS
+            )
+            print(
+                f"Пользователи {first_id}-{first_id + count - 1}: "
+                f"{session_id - 1} сессий, "
+                f"{time.perf_counter() - started:.1f} с"
+            )
+
+        # id задавались явно, сдвигаем последовательности за максимум.
+        # В SQLite следующий id и так max(id) + 1
+        for table in SEEDED_TABLES:
+            if conn.dialect.name != "postgresql":
+                break
+            await conn.execute(
                 text(
-                    "TRUNCATE TABLE users, user_progress, workout_sessions "
-                    "RESTART IDENTITY CASCADE;"
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"coalesce(max(id), 0) + 1, false) FROM {table}"
                 )
             )
 
-            # 1. Создаём пользователей
-            users: list[User] = []
+        # Дневной rollup и сводка по сгенерированным сессиям
+        db = AsyncSession(bind=conn)
+        await WorkoutDailyRollupDAO(db).rebuild_for_users(1, users)
+        await UserWorkoutSummaryDAO(db).rebuild_for_users(1, users)
 
-            # Генерируем общий хеш для всех тестовых пользователей,
-            # чтобы не тратить ресурсы процессора на хеширование в цикле
-            test_password = "password123"
-            hashed_pw = get_password_hash(test_password)
+    # ANALYZE вне транзакции заливки, чтобы планировщик видел объемы
+    async with engine.begin() as conn:
+        for table in ANALYZED_TABLES:
+            await conn.execute(text(f"ANALYZE {table}"))
 
-            for i in range(1, 7):
-                user = User(
-                    username=f"user_{i}",
-                    email=f"user{i}@example.com",
-                    password=hashed_pw,
-                )
-                db.add(user)
-                users.append(user)
-
-            # Получаем ID пользователей
-            await db.flush()
-
-            # 2. Прогресс и тренировки
-            for user in users:
-                exercises = [
-                    ExerciseType.PULL_UPS,
-                    ExerciseType.PUSH_UPS,
-                ]
-
-                for ex_type in exercises:
-                    progress = UserProgress(
-                        user_id=user.id,
-                        exercise_type=ex_type,
-                        difficulty=Difficulty.BEGINNER,
-                        current_reps_per_set=3,
-                    )
-                    db.add(progress)
-                    await db.flush()
-
-                    # 3. Генерируем 5 тренировок
-                    for _ in range(5):
-                        is_completed = random.choice([True, True, False])
-
-                        session = WorkoutSession(
-                            user_id=user.id,
-                            exercise_type=ex_type,
-                            difficulty=progress.difficulty,
-                            reps_per_set_at_start=progress.current_reps_per_set,
-                            completed=is_completed,
-                            notes="Случайная тренировка",
-                        )
-                        db.add(session)
-
-                        if is_completed:
-                            progress.up_level()
-                            progress.try_upgrade_difficulty()
-
-                        await db.flush()
-
-            await db.commit()
-            print("База успешно наполнена!")
-
-        except Exception as e:
-            await db.rollback()
-            print(f"Ошибка: {e}")
+    print(
+        f"База успешно наполнена: {users} пользователей, "
+        f"{session_id - 1} сессий за {time.perf_counter() - started:.1f} с"
+    )
 
 
 # ---------------------------------------------------------
 # Точка входа
 # ---------------------------------------------------------
 
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=6)
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=30,
+        help="За сколько последних дней раскидывать сессии",
+    )
+    parser.add_argument(
+        "--completion-ratio",
+        type=float,
+        default=2 / 3,
+        help="Доля завершенных сессий",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed генератора"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Сколько пользователей отправлять в одном COPY",
+    )
+    args = parser.parse_args()
+    try:
+        await seed_data(
+            users=args.users,
+            sessions_per_user=args.sessions_per_user,
+            days=args.days,
+            completion_ratio=args.completion_ratio,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+    finally:
+        await engine.dispose()
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_data())
+    asyncio.run(main())
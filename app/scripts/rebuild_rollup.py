@@ -0,0 +1,61 @@
+"""
+Пересборка workout_daily_rollup и user_workout_summary
+из workout_sessions.
+
+Запуск: python -m app.scripts.rebuild_rollup [--batch-size 1000]
+Пользователи обрабатываются диапазонами id, каждый диапазон — в своей
+транзакции, поэтому таблица не блокируется надолго.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.core.database import async_engine, async_session
+from app.dao.rollup_dao import WorkoutDailyRollupDAO
+from app.dao.summary_dao import UserWorkoutSummaryDAO
+from app.models.models import User
+
+
+async def rebuild_rollup(batch_size: int = 1000) -> int:
+    """
+    Пересчитать rollup и сводку для всех пользователей,
+    вернуть число строк rollup.
+    """
+    async with async_session() as session:
+        max_id = await session.scalar(select(func.max(User.id))) or 0
+
+    total = 0
+    for first_id in range(1, max_id + 1, batch_size):
+        last_id = first_id + batch_size - 1
+        async with async_session() as session:
+            total += await WorkoutDailyRollupDAO(session).rebuild_for_users(
+                first_id, last_id
+            )
+            await UserWorkoutSummaryDAO(session).rebuild_for_users(
+                first_id, last_id
+            )
+            await session.commit()
+        print(f"Пользователи {first_id}-{min(last_id, max_id)}: готово")
+    return total
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Сколько пользователей пересчитывать за одну транзакцию",
+    )
+    args = parser.parse_args()
+    try:
+        rows = await rebuild_rollup(args.batch_size)
+        print(f"Rollup пересобран: {rows} строк")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dao.progress_dao import UserProgressDAO
+from app.dao.workout_session_dao import WorkoutSessionsDAO
+from app.models.models import User
+
+
+class DashboardService:
+    def __init__(self, read_session: AsyncSession):
+        self.read_progress_dao = UserProgressDAO(read_session)
+        self.read_session_dao = WorkoutSessionsDAO(read_session)
+
+    async def get_dashboard(self, user: User) -> dict:
+        """
+        Профиль, весь прогресс и последняя сессия по каждому упражнению.
+        Пользователь уже загружен зависимостью, остальное — два запроса.
+        """
+        progress = await self.read_progress_dao.list_by_user_id(user.id)
+        last_sessions = await self.read_session_dao.list_last_per_exercise(
+            user.id
+        )
+        return {
+            "user": user,
+            "progress": progress,
+            "last_sessions": last_sessions,
+        }
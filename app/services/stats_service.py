@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dao.rollup_dao import WorkoutDailyRollupDAO
+from app.dao.workout_session_dao import WorkoutSessionsDAO
+from app.models.models import ExerciseType
+from app.schemas.stats import ExerciseStatsSchema
+
+
+class StatsService:
+    # Сколько последних тренировок учитывать в recent_completion_rate
+    RECENT_WINDOW = 10
+
+    def __init__(self, read_session: AsyncSession):
+        self.read_session_dao = WorkoutSessionsDAO(read_session)
+        self.read_rollup_dao = WorkoutDailyRollupDAO(read_session)
+
+    async def get_exercise_stats(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+    ) -> list[ExerciseStatsSchema]:
+        """Статистика тренировок пользователя по каждому упражнению."""
+        rows = await self.read_session_dao.stats_by_user(
+            user_id=user_id,
+            exercise_type=exercise_type,
+            recent_window=self.RECENT_WINDOW,
+        )
+        # created_at без таймзоны, в UTC (сессия БД в UTC)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return [
+            ExerciseStatsSchema(
+                exercise_type=row.exercise_type,
+                total_sessions=row.total_sessions,
+                completed_sessions=row.completed_sessions,
+                completion_rate=_rate(
+                    row.completed_sessions, row.total_sessions
+                ),
+                recent_completion_rate=_rate(
+                    row.recent_completed, row.recent_sessions
+                ),
+                avg_reps=round(float(row.avg_reps), 2),
+                best_reps=row.best_reps,
+                last_success_at=row.last_success_at,
+                seconds_since_last_success=(
+                    max(int((now - row.last_success_at).total_seconds()), 0)
+                    if row.last_success_at
+                    else None
+                ),
+            )
+            for row in rows
+        ]
+
+    async def get_calendar(
+        self,
+        user_id: int,
+        days: int,
+        exercise_type: ExerciseType | None = None,
+    ) -> list[Row]:
+        """Дневные счетчики за последние days дней из rollup."""
+        today = datetime.now(timezone.utc).date()
+        return await self.read_rollup_dao.list_by_user(
+            user_id=user_id,
+            date_from=today - timedelta(days=days - 1),
+            date_to=today,
+            exercise_type=exercise_type,
+        )
+
+
+def _rate(part: int, total: int) -> float:
+    """Доля part от total, 0 для пустой выборки."""
+    return round(part / total, 4) if total else 0.0
@@ -1,36 +1,56 @@
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from app.core.cache import read_flights
+from app.core.database import mark_primary_sticky
+from app.core.http_cache import make_etag
 from app.dao.progress_dao import UserProgressDAO
 from app.models.models import Difficulty, ExerciseType, UserProgress
-from app.schemas.user_progress import UserProgressReadSchema
 
 
 class UserProgressService:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self, session: AsyncSession, read_session: AsyncSession | None = None
+    ):
         self.session = session
         self.dao = UserProgressDAO(session)
+        # Только читающие методы могут идти в реплику
+        self.read_dao = UserProgressDAO(read_session or session)
 
-    async def get_user_progress(
-        self, user_id: int
-    ) -> list[UserProgressReadSchema]:
+    async def get_user_progress(self, user_id: int) -> list[Row]:
         """Получить список прогресса пользователя."""
-        progress = await self.dao.list_by_user_id(user_id=user_id)
-        return [
-            UserProgressReadSchema.model_validate(item) for item in progress
-        ]
+        return await read_flights.do(
+            user_id,
+            "progress",
+            lambda: self.read_dao.list_by_user_id(user_id=user_id),
+        )
+
+    async def get_progress_etag(
+        self, user_id: int
+    ) -> tuple[str, datetime | None]:
+        """ETag и Last-Modified списка прогресса без загрузки строк."""
+        count, last_modified = await read_flights.do(
+            user_id,
+            "progress_version",
+            lambda: self.read_dao.get_version(user_id),
+        )
+        return make_etag(user_id, count, last_modified), last_modified
 
     async def get_progress_for_exercise(
         self,
         user_id: int,
         exercise_type: ExerciseType,
-    ) -> UserProgressReadSchema | None:
+    ) -> Row | None:
         """Получить прогресс для конкретного упражнения."""
-        progress = await self.dao.get_by_user_and_exercise(
-            user_id=user_id,
-            exercise_type=exercise_type,
+        return await read_flights.do(
+            user_id,
+            ("progress", exercise_type),
+            lambda: self.read_dao.get_by_user_and_exercise(
+                user_id=user_id,
+                exercise_type=exercise_type,
+            ),
         )
-        if progress:
-            return UserProgressReadSchema.model_validate(progress)
-        return None
 
     async def create_progress(
         self,
@@ -40,11 +60,23 @@ class UserProgressService:
     ) -> UserProgress:
         """Создать новый прогресс с автоматическим определением уровня."""
         difficulty = Difficulty.from_reps(reps)
-        progress = await self.dao.create(
-            user_id=user_id,
-            exercise_type=exercise_type,
-            difficulty=difficulty,
-            current_reps_per_set=reps,
+        created = await self.dao.upsert(
+            [
+                {
+                    "user_id": user_id,
+                    "exercise_type": exercise_type,
+                    "difficulty": difficulty,
+                    "current_reps_per_set": reps,
+                }
+            ],
+            index_elements=["user_id", "exercise_type"],
         )
+        if not created:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Прогресс для этого упражнения уже существует",
+            )
         await self.session.commit()
-        return progress
+        mark_primary_sticky(user_id)
+        read_flights.invalidate(user_id)
+        return created[0]
@@ -1,10 +1,12 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import mark_primary_sticky
 from app.dao.users_dao import UsersDAO
 from app.schemas.users import UserCreateSchema
+from app.core.config import settings
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
 )
 
@@ -15,27 +17,39 @@ class UserService:
         self.dao = UsersDAO(session)
 
     async def register_user(self, user_data: UserCreateSchema) -> None:
-        """Зарегистрировать нового пользователя с проверкой уникальности."""
-        existing_user = await self.dao.find_by_login(login=user_data.username)
+        """
+        Зарегистрировать нового пользователя.
+        Уникальность проверяет сама вставка (ON CONFLICT DO NOTHING),
+        поэтому одновременные регистрации не приводят к ошибке 500.
+        """
+        user_dict = user_data.model_dump()
+        user_dict["password"] = await get_password_hash_async(
+            user_dict.pop("password")
+        )
 
-        if existing_user:
-            detail = "username уже занят"
+        created = await self.dao.upsert([user_dict])
+        if not created:
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail=detail
+                status_code=status.HTTP_409_CONFLICT,
+                detail="username или email уже занят",
             )
-
-        user_dict = user_data.model_dump()
-        user_dict["password"] = get_password_hash(user_dict.pop("password"))
-
-        await self.dao.create(**user_dict)
         await self.session.commit()
+        mark_primary_sticky(created[0].id)
 
     async def authenticate_user(self, login: str, password: str) -> str:
         """Аутентифицировать пользователя и вернуть JWT токен."""
         user = await self.dao.find_by_login(login)
-        if not user or not verify_password(password, user.password):
+        if not user or not await verify_password_async(
+            password, user.password
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверный логин или пароль",
             )
-        return create_access_token(subject=str(user.id))
+        claims = None
+        if settings.auth.CLAIMS_ONLY_AUTH:
+            claims = {
+                "username": user.username,
+                "ver": settings.auth.TOKEN_VERSION,
+            }
+        return create_access_token(subject=str(user.id), claims=claims)
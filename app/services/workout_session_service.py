@@ -1,18 +1,45 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 import math
+from app.core.cache import read_flights
+from app.core.database import mark_primary_sticky
+from app.core.http_cache import make_etag
+from app.core.pagination import encode_cursor, decode_cursor
 from app.dao.workout_session_dao import WorkoutSessionsDAO
 from app.dao.progress_dao import UserProgressDAO
+from app.dao.rollup_dao import WorkoutDailyRollupDAO, session_counters
+from app.dao.summary_dao import UserWorkoutSummaryDAO
 from app.models.models import (
     WorkoutSession,
     ExerciseType,
 )
+from app.schemas.workout_session import WorkoutSessionBatchItemSchema
 
 
 class WorkoutSessionService:
-    def __init__(self, session: AsyncSession):
+    # Насколько часы клиента могут спешить относительно сервера
+    MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+    def __init__(
+        self, session: AsyncSession, read_session: AsyncSession | None = None
+    ):
         self.session = session
         self.session_dao = WorkoutSessionsDAO(session)
         self.progress_dao = UserProgressDAO(session)
+        self.rollup_dao = WorkoutDailyRollupDAO(session)
+        self.summary_dao = UserWorkoutSummaryDAO(session)
+        # Только читающие методы могут идти в реплику
+        self.read_session_dao = WorkoutSessionsDAO(read_session or session)
+        self.read_summary_dao = UserWorkoutSummaryDAO(
+            read_session or session
+        )
 
     async def get_user_sessions_paginated(
         self,
@@ -21,14 +48,14 @@ class WorkoutSessionService:
         size: int,
     ) -> dict:
         """Получить все сессии пользователя с разбиением на страницы."""
-        total = await self.session_dao.count(user_id=user_id)
+        total = await self.read_summary_dao.count_sessions(user_id=user_id)
         pages = math.ceil(total / size) if total else 0
 
         if page > pages and pages != 0:
             page = pages
 
         offset = (page - 1) * size
-        items = await self.session_dao.list_by_user(
+        items = await self.read_session_dao.list_by_user(
             user_id=user_id,
             limit=size,
             offset=offset,
@@ -51,7 +78,7 @@ class WorkoutSessionService:
         size: int,
     ) -> dict:
         """Получить сессии по упражнению с разбиением на страницы."""
-        total = await self.session_dao.count(
+        total = await self.read_summary_dao.count_sessions(
             user_id=user_id,
             exercise_type=exercise_type,
         )
@@ -60,7 +87,7 @@ class WorkoutSessionService:
         if page > pages and pages != 0:
             page = pages
         offset = (page - 1) * size
-        items = await self.session_dao.list_by_user_and_exercise(
+        items = await self.read_session_dao.list_by_user_and_exercise(
             user_id=user_id,
             exercise_type=exercise_type,
             limit=size,
@@ -76,17 +103,176 @@ class WorkoutSessionService:
             "has_prev": page > 1,
         }
 
+    async def get_sessions_by_cursor(
+        self,
+        user_id: int,
+        size: int,
+        exercise_type: ExerciseType | None = None,
+        after: str | None = None,
+        before: str | None = None,
+        include_total: bool = False,
+    ) -> dict:
+        """
+        Получить страницу сессий по курсору (keyset-пагинация).
+        Общее количество считается только по запросу include_total.
+        """
+        if after and before:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Нельзя передавать after и before одновременно",
+            )
+        try:
+            after_key = decode_cursor(after) if after else None
+            before_key = decode_cursor(before) if before else None
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+            )
+
+        # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+        items = await self.read_session_dao.list_by_user_keyset(
+            user_id=user_id,
+            limit=size + 1,
+            exercise_type=exercise_type,
+            after=after_key,
+            before=before_key,
+        )
+        has_more = len(items) > size
+        if before_key is not None:
+            items = items[-size:] if has_more else items
+            has_next, has_prev = True, has_more
+        else:
+            items = items[:size]
+            has_next, has_prev = has_more, after_key is not None
+        # На пустой странице не из чего строить курсоры
+        has_next, has_prev = has_next and bool(items), has_prev and bool(items)
+
+        total = None
+        if include_total:
+            total = await self.read_summary_dao.count_sessions(
+                user_id=user_id,
+                exercise_type=exercise_type,
+            )
+
+        return {
+            "items": items,
+            "size": size,
+            "next_cursor": (
+                encode_cursor(items[-1].created_at, items[-1].id)
+                if has_next
+                else None
+            ),
+            "prev_cursor": (
+                encode_cursor(items[0].created_at, items[0].id)
+                if has_prev
+                else None
+            ),
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "total": total,
+        }
+
+    async def export_sessions(
+        self,
+        user_id: int,
+        export_format: str,
+        exercise_type: ExerciseType | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Выгрузить всю историю пользователя в NDJSON или CSV.
+        Отдает по одному куску текста на каждую пачку курсора.
+        """
+        result = await self.read_session_dao.stream_by_user(
+            user_id=user_id,
+            exercise_type=exercise_type,
+        )
+        columns = self.read_session_dao.EXPORT_COLUMNS
+        try:
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                async for partition in result.partitions():
+                    writer.writerows(
+                        [_export_value(v) for v in row] for row in partition
+                    )
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                # Заголовок без строк, если сессий нет
+                if buffer.tell():
+                    yield buffer.getvalue()
+            else:
+                async for partition in result.partitions():
+                    yield "".join(
+                        json.dumps(
+                            {
+                                name: _export_value(value)
+                                for name, value in zip(columns, row)
+                            },
+                            ensure_ascii=False,
+                        )
+                        + "\n"
+                        for row in partition
+                    )
+        finally:
+            await result.close()
+
     async def get_last_session(
         self,
         user_id: int,
         exercise_type: ExerciseType | None = None,
-    ) -> WorkoutSession | None:
-        """Получить последнюю сессию пользователя"""
-        session = await self.session_dao.get_last_session(
+    ) -> Row | None:
+        """
+        Получить последнюю сессию пользователя.
+        Указатель берется из сводки, сама сессия — по первичному ключу.
+        """
+        return await read_flights.do(
+            user_id,
+            ("last_session", exercise_type),
+            lambda: self._load_last_session(user_id, exercise_type),
+        )
+
+    async def _load_last_session(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None,
+    ) -> Row | None:
+        last = await self.read_summary_dao.get_last(
             user_id=user_id,
             exercise_type=exercise_type,
         )
-        return session
+        if last is None:
+            return None
+        return await self.read_session_dao.get_row_by_id(
+            last.last_session_id
+        )
+
+    async def get_last_session_etag(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType | None = None,
+    ) -> tuple[str, datetime | None]:
+        """
+        ETag и Last-Modified последней сессии по строке сводки.
+        Сводка обновляется при каждом старте и завершении сессии.
+        """
+        last = await read_flights.do(
+            user_id,
+            ("last_session_version", exercise_type),
+            lambda: self.read_summary_dao.get_last(
+                user_id=user_id,
+                exercise_type=exercise_type,
+            ),
+        )
+        if last is None:
+            return make_etag(user_id, exercise_type, None), None
+        return (
+            make_etag(
+                user_id, exercise_type, last.last_session_id, last.updated_at
+            ),
+            last.updated_at,
+        )
 
     async def start_session(
         self,
@@ -108,7 +294,22 @@ class WorkoutSessionService:
             difficulty=progress.difficulty,
             reps_per_set_at_start=progress.current_reps_per_set,
         )
+        await self.rollup_dao.increment(
+            [
+                {
+                    "user_id": user_id,
+                    "exercise_type": exercise_type,
+                    "day": workout_session.created_at.date(),
+                    **session_counters(
+                        False, workout_session.reps_per_set_at_start
+                    ),
+                }
+            ]
+        )
+        await self.summary_dao.record_sessions([workout_session])
         await self.session.commit()
+        mark_primary_sticky(user_id)
+        read_flights.invalidate(user_id)
         return workout_session
 
     async def finish_session(
@@ -118,23 +319,101 @@ class WorkoutSessionService:
         completed: bool,
         notes: str | None = None,
     ) -> WorkoutSession:
-        """Завершить сессию и обновить прогресс."""
-        session = await self.session_dao.get_by_id_and_user(
-            session_id, user_id
+        """Завершить сессию и обновить прогресс за один запрос."""
+        session = await self.session_dao.finish_with_progress(
+            session_id=session_id,
+            user_id=user_id,
+            completed=completed,
+            notes=notes,
         )
         if not session:
             raise ValueError("Сессия не найдена")
 
-        session.completed = completed
-        session.notes = notes
+        await self.session.commit()
+        mark_primary_sticky(user_id)
+        read_flights.invalidate(user_id)
+        return session
 
-        if completed:
-            progress = await self.progress_dao.get_by_user_and_exercise(
-                user_id, session.exercise_type
+    async def ingest_batch(
+        self,
+        user_id: int,
+        items: list[WorkoutSessionBatchItemSchema],
+    ) -> dict:
+        """
+        Загрузить пачку завершенных офлайн тренировок.
+        Прогресс пересчитывается в памяти в порядке items,
+        сессии вставляются одним INSERT, коммит один.
+        """
+        progress_list = await self.progress_dao.list_for_update(user_id)
+        progress_by_exercise = {p.exercise_type: p for p in progress_list}
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for item in items:
+            progress = progress_by_exercise.get(item.exercise_type)
+            if not progress:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=(
+                        f"Тренировка для упражнения "
+                        f"{item.exercise_type.value} не найдена"
+                    ),
+                )
+            performed_at = item.performed_at or now
+            if performed_at.tzinfo is None:
+                performed_at = performed_at.replace(tzinfo=timezone.utc)
+            performed_at = performed_at.astimezone(timezone.utc)
+            # Сессия из будущего навсегда осталась бы последней в сводке
+            if performed_at > now + self.MAX_CLOCK_SKEW:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="performed_at не может быть в будущем",
+                )
+            # created_at без таймзоны, в UTC (сессия БД в UTC)
+            created_at = performed_at.replace(tzinfo=None)
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "exercise_type": item.exercise_type,
+                    "difficulty": progress.difficulty,
+                    "reps_per_set_at_start": progress.current_reps_per_set,
+                    "completed": item.completed,
+                    "notes": item.notes,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
             )
-            progress.up_level()
-            progress.try_upgrade_difficulty()
+            if item.completed:
+                progress.up_level(at=performed_at)
+                progress.try_upgrade_difficulty()
 
+        sessions = await self.session_dao.bulk_create(rows)
+        await self.rollup_dao.increment(
+            [
+                {
+                    "user_id": user_id,
+                    "exercise_type": row["exercise_type"],
+                    "day": row["created_at"].date(),
+                    **session_counters(
+                        row["completed"], row["reps_per_set_at_start"]
+                    ),
+                }
+                for row in rows
+            ]
+        )
+        await self.summary_dao.record_sessions(sessions)
         await self.session.commit()
-        await self.session.refresh(session)
-        return session
+        mark_primary_sticky(user_id)
+        read_flights.invalidate(user_id)
+        # Перечитываем прогресс вместе с updated_at, выставленным базой
+        progress_list = await self.progress_dao.list_by_user_id(user_id)
+        return {"sessions": sessions, "progress": progress_list}
+
+
+def _export_value(value):
+    """Привести значение колонки к виду для NDJSON/CSV."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
@@ -0,0 +1,374 @@
+"""
+Нагрузочный прогон основных эндпоинтов с сравнением с baseline.
+
+Приложение гоняется в процессе через httpx.ASGITransport против
+настоящей базы из настроек (DB_*). Базу нужно заранее засеять:
+
+    python -m app.scripts.initial_data --users 2000 \\
+        --sessions-per-user 200 --days 365 --seed 1
+
+Сценарии: login, /progress/, /sessions/ на первой и последней странице,
+/sessions/last, start и finish (start/finish пишут в базу). Для каждого
+считаются пропускная способность и p50/p95/p99. Результат пишется в
+JSON и сравнивается с benchmarks/baselines/bench_endpoints.json:
+регрессия — p95 или пропускная способность хуже baseline больше чем на
+--tolerance. При регрессии код выхода 1.
+
+Параметры засева передаются через --dataset-* (по умолчанию — команда
+выше) и пишутся в meta. Если число CPU, нагрузка или данные не совпадают
+с baseline, сравнение не выполняется и код выхода 2.
+
+Запуск: python -m benchmarks.bench_endpoints --output bench_endpoints.json
+Обновить baseline: ... --output benchmarks/baselines/bench_endpoints.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import func, select
+
+from app.core.database import async_engine
+from app.main import app
+from app.models.models import ExerciseType, User
+
+PASSWORD = "password123"
+BASELINE_DIR = Path(__file__).parent / "baselines"
+DEFAULT_BASELINE = BASELINE_DIR / "bench_endpoints.json"
+PAGE_SIZE = 20
+# Страница за пределами истории: сервис прижимает ее к последней
+DEEP_PAGE = 10**6
+# Поля meta, которые должны совпасть с baseline для сравнения
+COMPARABLE_META = (
+    "cpu_count",
+    "users",
+    "requests",
+    "login_requests",
+    "concurrency",
+    "dataset",
+)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class BenchUser:
+    def __init__(self, username: str, token: str):
+        self.username = username
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # id сессий, начатых в сценарии start, для сценария finish
+        self.started: deque[int] = deque()
+
+
+Request = Callable[[AsyncClient, BenchUser], Awaitable[Response]]
+
+
+async def login(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.post(
+        "/auth/login", data={"username": user.username, "password": PASSWORD}
+    )
+
+
+async def progress(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get("/progress/", headers=user.headers)
+
+
+async def sessions_shallow(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get(
+        "/sessions/",
+        params={"page": 1, "size": PAGE_SIZE},
+        headers=user.headers,
+    )
+
+
+async def sessions_deep(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get(
+        "/sessions/",
+        params={"page": DEEP_PAGE, "size": PAGE_SIZE},
+        headers=user.headers,
+    )
+
+
+async def sessions_last(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.get("/sessions/last", headers=user.headers)
+
+
+async def start(client: AsyncClient, user: BenchUser) -> Response:
+    response = await client.post(
+        "/sessions/start",
+        json={"exercise_type": ExerciseType.PULL_UPS.value},
+        headers=user.headers,
+    )
+    if response.status_code == 201:
+        user.started.append(response.json()["id"])
+    return response
+
+
+async def finish(client: AsyncClient, user: BenchUser) -> Response:
+    return await client.patch(
+        f"/sessions/{user.started.popleft()}/finish",
+        json={"completed": True},
+        headers=user.headers,
+    )
+
+
+# Сценарий -> (запрос, ожидаемый статус). Порядок важен: finish
+# завершает сессии, начатые в start.
+SCENARIOS: dict[str, tuple[Request, int]] = {
+    "login": (login, 200),
+    "progress": (progress, 200),
+    "sessions_shallow": (sessions_shallow, 200),
+    "sessions_deep": (sessions_deep, 200),
+    "sessions_last": (sessions_last, 200),
+    "start": (start, 201),
+    "finish": (finish, 200),
+}
+
+
+async def count_seeded_users() -> int:
+    async with async_engine.connect() as conn:
+        return await conn.scalar(select(func.count()).select_from(User))
+
+
+async def prepare_users(client: AsyncClient, count: int) -> list[BenchUser]:
+    """Залогинить первых count засеянных пользователей."""
+    users = []
+    for user_id in range(1, count + 1):
+        username = f"user_{user_id}"
+        response = await client.post(
+            "/auth/login", data={"username": username, "password": PASSWORD}
+        )
+        if response.status_code != 200:
+            raise SystemExit(
+                f"Не удалось войти как {username}: база не засеяна?"
+            )
+        users.append(BenchUser(username, response.json()["access_token"]))
+    return users
+
+
+async def run_scenario(
+    client: AsyncClient,
+    users: list[BenchUser],
+    request: Request,
+    expected_status: int,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Выполнить requests запросов в concurrency воркеров."""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            user = users[index % len(users)]
+            started = time.perf_counter()
+            response = await request(client, user)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != expected_status:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+def meta_mismatches(meta: dict, baseline_meta: dict) -> list[str]:
+    """Условия прогона, которыми он отличается от baseline."""
+    return [
+        f"{key}: {meta.get(key)} против {baseline_meta.get(key)}"
+        for key in COMPARABLE_META
+        if meta.get(key) != baseline_meta.get(key)
+    ]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сравнить с baseline, вернуть описания регрессий."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']} ms "
+                f"против {base['p95_ms']} ms"
+            )
+        if current["throughput_rps"] < base["throughput_rps"] / (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{name}: {current['throughput_rps']} rps "
+                f"против {base['throughput_rps']} rps"
+            )
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} ошибок")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--users", type=int, default=50, help="Сколько пользователей гонять"
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--login-requests",
+        type=int,
+        default=50,
+        help="Логин упирается в bcrypt, поэтому запросов меньше",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--warmup", type=int, default=100, help="Запросов на прогрев"
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument(
+        "--dataset-users",
+        type=int,
+        default=2000,
+        help="С каким --users засеяна база",
+    )
+    parser.add_argument("--dataset-sessions-per-user", type=int, default=200)
+    parser.add_argument("--dataset-days", type=int, default=365)
+    parser.add_argument("--dataset-seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Допустимое ухудшение относительно baseline (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+    if "finish" in args.scenarios and "start" not in args.scenarios:
+        parser.error("сценарию finish нужны сессии из сценария start")
+
+    results = {}
+    try:
+        seeded = await count_seeded_users()
+        if seeded != args.dataset_users:
+            raise SystemExit(
+                f"В базе {seeded} пользователей, а --dataset-users "
+                f"{args.dataset_users}: база засеяна иначе"
+            )
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            users = await prepare_users(client, args.users)
+            for name in args.scenarios:
+                request, expected_status = SCENARIOS[name]
+                requests = (
+                    args.login_requests if name == "login" else args.requests
+                )
+                # finish не прогревается: ему нужна ровно одна сессия
+                # из start на каждый запрос
+                if args.warmup and name not in ("start", "finish"):
+                    await run_scenario(
+                        client,
+                        users,
+                        request,
+                        expected_status,
+                        min(args.warmup, requests),
+                        args.concurrency,
+                    )
+                results[name] = await run_scenario(
+                    client,
+                    users,
+                    request,
+                    expected_status,
+                    requests,
+                    args.concurrency,
+                )
+                r = results[name]
+                print(
+                    f"{name:<17} {r['throughput_rps']:>8.1f} rps  "
+                    f"p50={r['p50_ms']:8.2f}  p95={r['p95_ms']:8.2f}  "
+                    f"p99={r['p99_ms']:8.2f} ms  errors={r['errors']}"
+                )
+    finally:
+        await async_engine.dispose()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "users": args.users,
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "concurrency": args.concurrency,
+            "dataset": {
+                "users": args.dataset_users,
+                "sessions_per_user": args.dataset_sessions_per_user,
+                "days": args.dataset_days,
+                "seed": args.dataset_seed,
+            },
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + "\n"
+        )
+        print(f"Результаты записаны в {args.output}")
+
+    # При обновлении baseline сравнивать не с чем
+    writes_baseline = (
+        args.output is not None
+        and args.output.resolve() == args.baseline.resolve()
+    )
+    if not writes_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        mismatches = meta_mismatches(report["meta"], baseline["meta"])
+        if mismatches:
+            print("Baseline снят в других условиях, сравнения нет:")
+            for line in mismatches:
+                print(f"  {line}")
+            return 2
+        regressions = compare(
+            results, baseline["results"], args.tolerance
+        )
+        if regressions:
+            print("Регрессии относительно baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Регрессий относительно baseline нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,158 @@
+"""
+Задержка /sessions/last во время волны логинов.
+
+Приложение гоняется в процессе через httpx.ASGITransport, БД заменена
+заглушками: измеряется только влияние bcrypt на event loop. Сценарии:
+
+- idle     — только /sessions/last;
+- blocking — логины с bcrypt прямо в event loop (старое поведение);
+- pool     — логины через PasswordHasher (текущее поведение).
+
+Запуск: python -m benchmarks.bench_login_burst --logins 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.security import (
+    get_current_principal,
+    get_password_hash,
+    verify_password,
+)
+from app.main import app
+from app.models.models import Difficulty, ExerciseType
+from app.routers.auth import get_user_service
+from app.routers.workout_session import get_workout_session_read_service
+from app.schemas.users import PrincipalSchema
+from app.services.user_service import UserService
+
+PASSWORD = "password123"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def install_stubs() -> None:
+    """Подменить зависимости, чтобы бенчмарку не нужна была БД."""
+    user = SimpleNamespace(
+        id=1, username="bench", password=get_password_hash(PASSWORD)
+    )
+    user_service = UserService(AsyncMock())
+    user_service.dao = AsyncMock()
+    user_service.dao.find_by_login.return_value = user
+
+    now = datetime.now()
+    last_session = SimpleNamespace(
+        id=1,
+        user_id=1,
+        exercise_type=ExerciseType.PULL_UPS,
+        difficulty=Difficulty.BEGINNER,
+        reps_per_set_at_start=3,
+        completed=True,
+        notes=None,
+        created_at=now,
+        updated_at=now,
+    )
+    session_service = AsyncMock()
+    session_service.get_last_session.return_value = last_session
+
+    async def principal():
+        return PrincipalSchema(id=1, username="bench")
+
+    app.dependency_overrides[get_user_service] = lambda: user_service
+    app.dependency_overrides[get_workout_session_read_service] = (
+        lambda: session_service
+    )
+    app.dependency_overrides[get_current_principal] = principal
+
+
+async def probe_latency(
+    client: AsyncClient, stop: asyncio.Event, interval: float
+) -> list[float]:
+    """Опрашивать /sessions/last, пока не будет выставлен stop."""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/sessions/last")
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def hammer_logins(
+    client: AsyncClient, logins: int, concurrency: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            response = await client.post(
+                "/auth/login",
+                data={"username": "bench", "password": PASSWORD},
+            )
+            assert response.status_code == 200
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def run_scenario(
+    name: str, logins: int, concurrency: int, interval: float
+) -> None:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as c:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_latency(c, stop, interval))
+        if logins:
+            await hammer_logins(c, logins, concurrency)
+        else:
+            await asyncio.sleep(2)
+        stop.set()
+        latencies = await probe
+
+    print(
+        f"{name:<9} probes={len(latencies):<5} "
+        f"p50={percentile(latencies, 50):8.2f} ms  "
+        f"p99={percentile(latencies, 99):8.2f} ms  "
+        f"max={max(latencies):8.2f} ms  "
+        f"mean={statistics.fmean(latencies):8.2f} ms"
+    )
+
+
+async def blocking_verify(plain_password: str, hashed_password: str) -> bool:
+    """Старое поведение: bcrypt прямо в event loop."""
+    return verify_password(plain_password, hashed_password)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--interval", type=float, default=0.005, help="Пауза между пробами, с"
+    )
+    args = parser.parse_args()
+
+    install_stubs()
+    await run_scenario("idle", 0, args.concurrency, args.interval)
+    with patch(
+        "app.services.user_service.verify_password_async", blocking_verify
+    ):
+        await run_scenario(
+            "blocking", args.logins, args.concurrency, args.interval
+        )
+    await run_scenario("pool", args.logins, args.concurrency, args.interval)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
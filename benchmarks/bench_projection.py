@@ -0,0 +1,159 @@
+"""
+ORM-сущности против проекции колонок (BaseDAO.list / list_rows).
+
+Для страницы сессий одного пользователя измеряется:
+- задержка запроса DAO (новая AsyncSession на каждую итерацию,
+  как на каждый HTTP-запрос);
+- память на один вызов (tracemalloc): пик вместе с валидацией в схему
+  ответа через orm_response и сколько держит результат в сессии.
+
+По умолчанию база — SQLite в памяти (нужен aiosqlite). Для PostgreSQL
+передайте --url: таблицы создаются в отдельной схеме bench_projection
+и удаляются после прогона.
+
+Запуск: python -m benchmarks.bench_projection --rows 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.serialization import orm_response
+from app.dao.workout_session_dao import WorkoutSessionsDAO
+from app.models.models import (
+    Base,
+    Difficulty,
+    ExerciseType,
+    User,
+    WorkoutSession,
+)
+from app.schemas.workout_session import WorkoutSessionReadSchema
+
+SCHEMA = "bench_projection"
+SESSIONS = 5000
+
+
+def make_engine(url: str):
+    if url.startswith("postgresql"):
+        return create_async_engine(
+            url, connect_args={"server_settings": {"search_path": SCHEMA}}
+        )
+    return create_async_engine(url, poolclass=StaticPool)
+
+
+async def seed(engine) -> None:
+    now = datetime.now()
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            {"id": 1, "username": "bench", "email": "b@x.io", "password": ""},
+        )
+        await conn.execute(
+            insert(WorkoutSession),
+            [
+                {
+                    "user_id": 1,
+                    "exercise_type": ExerciseType.PULL_UPS,
+                    "difficulty": Difficulty.INTERMEDIATE,
+                    "reps_per_set_at_start": 7,
+                    "completed": i % 3 != 0,
+                    "notes": "Заметка" if i % 2 else None,
+                    "created_at": now - timedelta(minutes=i),
+                    "updated_at": now - timedelta(minutes=i),
+                }
+                for i in range(SESSIONS)
+            ],
+        )
+
+
+async def drop(engine) -> None:
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+def page_query(method: str, rows: int):
+    order_by = [WorkoutSession.created_at.desc(), WorkoutSession.id.desc()]
+
+    async def run(session: AsyncSession):
+        dao = WorkoutSessionsDAO(session)
+        return await getattr(dao, method)(
+            user_id=1, order_by=order_by, limit=rows
+        )
+
+    return run
+
+
+async def measure_latency(engine, query, iterations: int) -> list[float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        async with AsyncSession(engine) as session:
+            await query(session)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def measure_memory(engine, query, iterations: int) -> tuple:
+    """
+    Средние на вызов, KiB: пик при запросе и валидации в схему и
+    сколько памяти держит результат, пока жива сессия (запрос).
+    """
+    peaks, held = [], []
+    tracemalloc.start()
+    for _ in range(iterations):
+        async with AsyncSession(engine) as session:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            items = await query(session)
+            after_query, _ = tracemalloc.get_traced_memory()
+            orm_response(list[WorkoutSessionReadSchema], items)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - base) / 1024)
+            held.append((after_query - base) / 1024)
+            del items
+    tracemalloc.stop()
+    return statistics.fmean(peaks), statistics.fmean(held)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    try:
+        await seed(engine)
+        for name, method in (("entities", "list"), ("rows", "list_rows")):
+            query = page_query(method, args.rows)
+            await measure_latency(engine, query, 20)  # прогрев
+            latencies = await measure_latency(engine, query, args.iterations)
+            peak, held = await measure_memory(
+                engine, query, max(args.iterations // 10, 10)
+            )
+            print(
+                f"{name:<9} rows={args.rows:<4} "
+                f"p50={statistics.median(latencies):7.3f} ms  "
+                f"mean={statistics.fmean(latencies):7.3f} ms  "
+                f"peak={peak:7.1f} KiB  held={held:7.1f} KiB"
+            )
+    finally:
+        await drop(engine)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+CPU на сериализацию одной страницы из 100 сессий.
+
+Сравниваются два пути ответа для GET /sessions/:
+
+- legacy — как было: PaginatedResponse[...](**data) в роутере, затем
+  FastAPI еще раз валидирует его через response_model
+  (serialize_response) и кодирует стандартным json;
+- single — orm_response: один проход cached TypeAdapter по ORM-объектам
+  и кодирование orjson.
+
+Объекты WorkoutSession создаются в памяти, БД не нужна.
+Запуск: python -m benchmarks.bench_serialization --iterations 2000
+"""
+
+import argparse
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.core.serialization import orm_response
+from app.main import app
+from app.models.models import Difficulty, ExerciseType, WorkoutSession
+from app.schemas.workout_session import (
+    PaginatedResponse,
+    WorkoutSessionReadSchema,
+)
+
+
+def make_page(size: int) -> dict:
+    """Страница в том виде, в каком ее возвращает сервис."""
+    now = datetime.now()
+    items = [
+        WorkoutSession(
+            id=i,
+            user_id=1,
+            exercise_type=ExerciseType.PULL_UPS,
+            difficulty=Difficulty.INTERMEDIATE,
+            reps_per_set_at_start=7,
+            completed=i % 3 != 0,
+            notes="Заметка к тренировке" if i % 2 else None,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(minutes=i),
+        )
+        for i in range(size)
+    ]
+    return {
+        "items": items,
+        "total": 1000,
+        "page": 1,
+        "size": size,
+        "pages": math.ceil(1000 / size),
+        "has_next": True,
+        "has_prev": False,
+    }
+
+
+def sessions_route() -> APIRoute:
+    return next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path == "/sessions/"
+    )
+
+
+async def legacy(page: dict, route: APIRoute) -> bytes:
+    content = PaginatedResponse[WorkoutSessionReadSchema](**page)
+    value = await serialize_response(
+        field=route.response_field, response_content=content
+    )
+    return JSONResponse(value).body
+
+
+async def single(page: dict, route: APIRoute) -> bytes:
+    return orm_response(PaginatedResponse[WorkoutSessionReadSchema], page).body
+
+
+async def measure(func, page: dict, route: APIRoute, iterations: int):
+    await func(page, route)  # прогрев: схемы и TypeAdapter
+    started = time.process_time()
+    for _ in range(iterations):
+        body = await func(page, route)
+    elapsed = time.process_time() - started
+    return elapsed / iterations * 1_000_000, len(body)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=100)
+    args = parser.parse_args()
+
+    page = make_page(args.size)
+    route = sessions_route()
+    results = {}
+    for name, func in (("legacy", legacy), ("single", single)):
+        per_request, body_size = await measure(
+            func, page, route, args.iterations
+        )
+        results[name] = per_request
+        print(
+            f"{name:<7} {per_request:9.1f} us/request  "
+            f"body={body_size} bytes"
+        )
+    saved = results["legacy"] - results["single"]
+    print(
+        f"saved   {saved:9.1f} us/request "
+        f"({saved / results['legacy'] * 100:.0f}%)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
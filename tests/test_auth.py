@@ -1,8 +1,14 @@
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.routers.auth import get_user_service
-from unittest.mock import AsyncMock
+from app.core.config import settings
+from app.core.security import create_access_token, get_current_principal
+from app.models.models import User
+from app.schemas.users import UserCreateSchema
+from app.services.user_service import UserService
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 @pytest.fixture
@@ -122,3 +128,66 @@ async def test_login_user_invalid_data(mock_user_service):
         assert response.status_code == 422  # Unprocessable Entity
     finally:
         app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_principal_from_claims_without_db():
+    """В stateless-режиме principal берется из токена без запроса в БД."""
+    token = create_access_token(
+        subject="5",
+        claims={"username": "claims", "ver": settings.auth.TOKEN_VERSION},
+    )
+    session = AsyncMock()
+
+    with patch.object(settings.auth, "CLAIMS_ONLY_AUTH", True):
+        principal = await get_current_principal(token=token, session=session)
+
+    assert principal.id == 5
+    assert principal.username == "claims"
+    session.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_principal_with_stale_token_version_loads_user():
+    """Токен старой версии не принимается на веру и проверяется по БД."""
+    token = create_access_token(
+        subject="5",
+        claims={"username": "claims", "ver": settings.auth.TOKEN_VERSION - 1},
+    )
+    user = MagicMock(spec=User)
+    user.id = 5
+    user.username = "from-db"
+
+    with patch.object(settings.auth, "CLAIMS_ONLY_AUTH", True), patch(
+        "app.core.security._load_user", AsyncMock(return_value=user)
+    ) as load_user:
+        principal = await get_current_principal(token=token, session=None)
+
+    assert principal.username == "from-db"
+    load_user.assert_awaited_once_with(None, 5)
+
+
+@pytest.mark.asyncio
+async def test_register_user_conflict_single_insert():
+    """Занятый username/email — 409 после одной вставки, без коммита."""
+    service = UserService(AsyncMock())
+    service.dao = AsyncMock()
+    service.dao.upsert.return_value = []
+
+    with patch(
+        "app.services.user_service.get_password_hash_async",
+        AsyncMock(return_value="hash"),
+    ):
+        with pytest.raises(HTTPException) as exc_info:
+            await service.register_user(
+                UserCreateSchema(
+                    username="taken",
+                    email="taken@example.com",
+                    password="password123",
+                )
+            )
+
+    assert exc_info.value.status_code == 409
+    service.dao.upsert.assert_awaited_once()
+    service.dao.find_by_login.assert_not_called()
+    service.session.commit.assert_not_called()
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core import cache as cache_module
+from app.core.cache import SingleFlight, TTLCache
+from app.core.http_cache import etag_matches, make_etag
+from app.core.security import _load_user
+from app.models.models import User
+
+
+def test_cache_hit_and_miss_counters():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get(1) is None
+    cache.set(1, "user")
+    assert cache.get(1) == "user"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)  # 1 становится самым свежим
+    cache.set(3, "c")
+
+    assert 1 in cache
+    assert 2 not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_by_ttl():
+    cache = TTLCache(maxsize=10, ttl=5)
+    with patch.object(cache_module.time, "monotonic", return_value=100.0):
+        cache.set(1, "a")
+    with patch.object(cache_module.time, "monotonic", return_value=106.0):
+        assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_load_user_uses_cache_after_first_lookup():
+    """Повторная загрузка пользователя не ходит в БД."""
+    user = User(id=7, username="cached", email="c@example.com", password="x")
+    session = AsyncMock()
+    session.merge.side_effect = lambda obj, load: obj
+
+    with patch("app.core.security.user_cache", TTLCache(10, 60)), patch(
+        "app.core.security.UsersDAO"
+    ) as dao_cls:
+        dao_cls.return_value.get_by_id = AsyncMock(return_value=user)
+
+        first = await _load_user(session, 7)
+        second = await _load_user(session, 7)
+
+    assert first is user
+    assert second.username == "cached"
+    dao_cls.return_value.get_by_id.assert_awaited_once_with(7)
+    session.merge.assert_awaited_once()
+
+
+def test_make_etag_is_stable_and_weak():
+    etag = make_etag(1, 3, "2025-01-01")
+    assert etag == make_etag(1, 3, "2025-01-01")
+    assert etag != make_etag(1, 4, "2025-01-01")
+    assert etag.startswith('W/"')
+
+
+def test_etag_matches_if_none_match_list():
+    etag = make_etag(1)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def make_slow_read(result="rows"):
+    """Чтение, которое ждет сигнала, и счетчик его вызовов."""
+    calls = []
+    release = asyncio.Event()
+
+    async def read():
+        calls.append(1)
+        await release.wait()
+        return result
+
+    return read, calls, release
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_concurrent_reads():
+    flights = SingleFlight()
+    read, calls, release = make_slow_read()
+
+    tasks = [
+        asyncio.create_task(flights.do(1, "progress", read)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["rows"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "shared": 4}
+
+
+@pytest.mark.asyncio
+async def test_single_flight_invalidate_starts_new_read():
+    """После записи новые вызовы не ждут чтение, начатое до нее."""
+    flights = SingleFlight()
+    stale, _, release_stale = make_slow_read("old")
+    fresh, fresh_calls, release_fresh = make_slow_read("new")
+
+    before_write = asyncio.create_task(flights.do(1, "progress", stale))
+    await asyncio.sleep(0)
+    flights.invalidate(1)
+    after_write = asyncio.create_task(flights.do(1, "progress", fresh))
+    await asyncio.sleep(0)
+    release_stale.set()
+    release_fresh.set()
+
+    assert await before_write == "old"
+    assert await after_write == "new"
+    assert len(fresh_calls) == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_survives_cancel():
+    flights = SingleFlight()
+    failing = AsyncMock(side_effect=ValueError("boom"))
+    with pytest.raises(ValueError):
+        await flights.do(1, "progress", failing)
+
+    # Отмена ведущего вызова: ждущий читает сам
+    read, calls, release = make_slow_read()
+    leader = asyncio.create_task(flights.do(2, "progress", read))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do(2, "progress", read))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    assert await follower == "rows"
+    assert len(calls) == 2
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from unittest.mock import AsyncMock, MagicMock
+from app.main import app
+from app.core import security
+from app.core.database import get_session
+from app.core.security import create_access_token, get_current_user
+from app.routers.dashboard import get_dashboard_service
+from app.services.dashboard_service import DashboardService
+
+
+@pytest.mark.asyncio
+async def test_dashboard_service_reads_progress_and_last_sessions():
+    """Прогресс и последние сессии берутся двумя запросами DAO."""
+    user = MagicMock(id=7)
+    service = DashboardService(AsyncMock())
+    service.read_progress_dao = AsyncMock()
+    service.read_progress_dao.list_by_user_id.return_value = ["progress"]
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.list_last_per_exercise.return_value = ["last"]
+
+    dashboard = await service.get_dashboard(user)
+
+    assert dashboard == {
+        "user": user,
+        "progress": ["progress"],
+        "last_sessions": ["last"],
+    }
+    service.read_progress_dao.list_by_user_id.assert_called_once_with(7)
+    service.read_session_dao.list_last_per_exercise.assert_called_once_with(
+        7
+    )
+
+
+@pytest.mark.asyncio
+async def test_dashboard_endpoint_hides_password():
+    user = MagicMock(id=1, username="alice", email="a@example.com")
+    user.password = "hash"
+    mock_service = AsyncMock()
+    mock_service.get_dashboard.return_value = {
+        "user": user,
+        "progress": [],
+        "last_sessions": [],
+    }
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_dashboard_service] = lambda: mock_service
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get("/me/dashboard")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "user": {"id": 1, "username": "alice", "email": "a@example.com"},
+        "progress": [],
+        "last_sessions": [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_dashboard_decodes_token_once(monkeypatch):
+    """Токен разбирается и пользователь грузится один раз за запрос."""
+    user = MagicMock(id=1, username="alice", email="a@example.com")
+    decode = MagicMock(wraps=security._decode_token)
+    load_user = AsyncMock(return_value=user)
+    monkeypatch.setattr(security, "_decode_token", decode)
+    monkeypatch.setattr(security, "_load_user", load_user)
+    monkeypatch.setattr(
+        DashboardService,
+        "get_dashboard",
+        AsyncMock(
+            return_value={"user": user, "progress": [], "last_sessions": []}
+        ),
+    )
+
+    async def override_get_session():
+        yield AsyncMock()
+
+    app.dependency_overrides[get_session] = override_get_session
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get(
+                "/me/dashboard",
+                headers={
+                    "Authorization": f"Bearer {create_access_token('1')}"
+                },
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    decode.assert_called_once()
+    load_user.assert_called_once()
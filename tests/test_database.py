@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.security import get_read_session
+from app.schemas.users import PrincipalSchema
+
+
+def test_reads_from_primary_without_replica():
+    with patch.object(database, "replica_session", None):
+        database.mark_primary_sticky(1)
+        assert database.reads_from_primary(1) is True
+
+
+def test_recent_writer_sticks_to_primary():
+    with patch.object(database, "replica_session", MagicMock()), patch.object(
+        database, "_recent_writers", TTLCache(10, 60)
+    ):
+        assert database.reads_from_primary(1) is False
+        database.mark_primary_sticky(1)
+        assert database.reads_from_primary(1) is True
+        assert database.reads_from_primary(2) is False
+
+
+@pytest.mark.asyncio
+async def test_read_session_reuses_primary_when_sticky():
+    """Недавно писавший пользователь получает сессию primary."""
+    primary = MagicMock()
+    principal = PrincipalSchema(id=1, username="writer")
+
+    with patch("app.core.security.reads_from_primary", return_value=True):
+        generator = get_read_session(principal=principal, session=primary)
+        assert await generator.__anext__() is primary
+
+
+@pytest.mark.parametrize("pgbouncer", [False, True])
+def test_connect_args_pin_utc_timezone(pgbouncer):
+    """now() для колонок без таймзоны должен писать UTC, как приложение."""
+    with patch.object(
+        database.settings.db, "DB_PGBOUNCER_TRANSACTION_MODE", pgbouncer
+    ):
+        args = database._connect_args()
+    assert args["server_settings"] == {"timezone": "UTC"}
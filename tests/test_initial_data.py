@@ -0,0 +1,68 @@
+import random
+from datetime import datetime
+
+from app.scripts.initial_data import (
+    PROGRESS_COLUMNS,
+    SESSION_COLUMNS,
+    generate_batch,
+)
+
+# --- Тесты генератора тестовых данных (без БД) ---
+
+
+def make_batch(seed: int = 1):
+    return generate_batch(
+        random.Random(seed),
+        first_user_id=11,
+        user_count=3,
+        first_session_id=101,
+        sessions_per_user=40,
+        start=datetime(2025, 1, 1),
+        days=30,
+        completion_ratio=0.7,
+        password_hash="hash",
+    )
+
+
+def test_generate_batch_is_deterministic():
+    assert make_batch(seed=7) == make_batch(seed=7)
+
+
+def test_generate_batch_ids_and_order():
+    batch = make_batch()
+    sessions = [dict(zip(SESSION_COLUMNS, row)) for row in batch.sessions]
+
+    assert [u[0] for u in batch.users] == [11, 12, 13]
+    assert [s["id"] for s in sessions] == list(range(101, 221))
+    for user_id in (11, 12, 13):
+        times = [s["created_at"] for s in sessions if s["user_id"] == user_id]
+        assert times == sorted(times)
+    # Прогресс пользователя 11 начинается сразу за пользователем 10
+    assert batch.progress[0][0] == 10 * 4 + 1
+
+
+def test_generate_batch_progress_matches_sessions():
+    """Итоговый прогресс совпадает с проигрышем последней сессии."""
+    batch = make_batch()
+    sessions = [dict(zip(SESSION_COLUMNS, row)) for row in batch.sessions]
+
+    for row in batch.progress:
+        progress = dict(zip(PROGRESS_COLUMNS, row))
+        own = [
+            s
+            for s in sessions
+            if s["user_id"] == progress["user_id"]
+            and s["exercise_type"] == progress["exercise_type"]
+        ]
+        completed = [s for s in own if s["completed"]]
+        if not completed:
+            assert progress["current_reps_per_set"] == 3
+            assert progress["last_success_at"] is None
+            continue
+        # Переход на новую сложность дает ровно reps + 1 (6 и 13)
+        last = own[-1]
+        reps = last["reps_per_set_at_start"] + int(last["completed"])
+        assert progress["current_reps_per_set"] == reps
+        assert progress["last_success_at"].replace(
+            tzinfo=None
+        ) == completed[-1]["created_at"]
@@ -0,0 +1,105 @@
+import fastapi
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core.database import PoolStats, build_engine
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    render_metrics,
+)
+
+# --- Тесты метрик (SQLite в tmp_path, без PostgreSQL) ---
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram("latency", "Задержка", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/a")
+
+    lines = list(histogram.collect())
+
+    assert 'latency_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'latency_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_sum{route="/a"} 4.05' in lines
+    assert 'latency_count{route="/a"} 4' in lines
+
+
+def test_counter_escapes_labels():
+    counter = Counter("hits", "Попадания", ("path",))
+    counter.inc(2, 'a"b')
+
+    assert 'hits{path="a\\"b"} 2' in list(counter.collect())
+
+
+def test_render_metrics_includes_pools():
+    body = render_metrics(
+        {
+            "primary": {
+                "checkouts": 3,
+                "timeouts": 0,
+                "wait_total_seconds": 0.25,
+                "wait_max_seconds": 0.2,
+                "checked_out": 1,
+                "size": 5,
+            }
+        }
+    )
+
+    assert 'db_pool_wait_seconds_total{pool="primary"} 0.25' in body
+    assert 'db_pool_checked_out{pool="primary"} 1' in body
+    assert "http_requests_in_flight 0" in body
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_queries_per_route(tmp_path, monkeypatch):
+    """Запросы к БД внутри обработчика попадают в метрики его маршрута."""
+    monkeypatch.setattr(
+        metrics,
+        "http_request_db_queries",
+        Histogram("q", "", ("method", "route"), metrics.QUERY_COUNT_BUCKETS),
+    )
+    monkeypatch.setattr(
+        metrics,
+        "http_request_duration",
+        Histogram("d", "", ("method", "route", "status")),
+    )
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}",
+        PoolStats(),
+        name="test",
+    )
+    app = fastapi.FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+            await client.get("/missing")
+    finally:
+        await engine.dispose()
+
+    queries = metrics.http_request_db_queries._series
+    counts, total = queries[("GET", "/items/{item_id}")]
+    # Два SELECT и BEGIN, который SQLite-движок выполняет явно
+    assert total == 6
+    assert counts[metrics.QUERY_COUNT_BUCKETS.index(3)] == 2
+    durations = metrics.http_request_duration._series
+    assert ("GET", "/items/{item_id}", "200") in durations
+    assert ("GET", "unmatched", "404") in durations
+    assert metrics.requests_in_flight == 0
@@ -1,5 +1,6 @@
 import pytest
-from app.models.models import UserProgress, Difficulty, ExerciseType
+from sqlalchemy import select, update
+from app.models.models import UserProgress, Difficulty, ExerciseType, User
 
 # --- Тесты логики Difficulty (без БД) ---
 
@@ -41,3 +42,41 @@ def test_validate_reps_error(session):
         progress.current_reps_per_set = 10  # Для новичка максимум 5
 
     assert "нельзя выбрать 10 повторов" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "difficulty, reps",
+    [
+        (Difficulty.BEGINNER, 3),
+        (Difficulty.BEGINNER, 5),
+        (Difficulty.INTERMEDIATE, 11),
+        (Difficulty.INTERMEDIATE, 12),
+        (Difficulty.ADVANCED, 20),
+    ],
+)
+def test_level_up_sql_matches_python(session, difficulty, reps):
+    """SQL-правило повышения уровня совпадает с up_level + апгрейдом."""
+    session.add(User(id=1, username="u", email="u@example.com", password="x"))
+    session.add(
+        UserProgress(
+            user_id=1,
+            exercise_type=ExerciseType.PULL_UPS,
+            difficulty=difficulty,
+            current_reps_per_set=reps,
+        )
+    )
+    session.commit()
+
+    expected = UserProgress(difficulty=difficulty, current_reps_per_set=reps)
+    expected.up_level()
+    expected.try_upgrade_difficulty()
+
+    session.execute(
+        update(UserProgress).values(**UserProgress.level_up_values())
+    )
+    progress = session.scalars(select(UserProgress)).one()
+    session.refresh(progress)
+
+    assert progress.difficulty == expected.difficulty
+    assert progress.current_reps_per_set == expected.current_reps_per_set
+    assert progress.last_success_at is not None
@@ -0,0 +1,146 @@
+import collections
+
+import fastapi
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import PoolStats, build_engine
+from app.core.query_budget import (
+    QueryBudgetExceeded,
+    QueryBudgetMiddleware,
+    find_repeated,
+    normalize_statement,
+    query_budget,
+)
+
+# --- Тесты бюджета SQL-запросов и поиска N+1 ---
+
+
+def test_normalize_statement_ignores_parameters():
+    assert normalize_statement(
+        "SELECT * FROM t\n WHERE id IN ($1::INTEGER, $2::INTEGER)"
+    ) == normalize_statement("SELECT * FROM t WHERE id IN ($7::INTEGER)")
+    assert normalize_statement(
+        "SELECT * FROM t WHERE id IN (?, ?, ?)"
+    ) == normalize_statement("SELECT * FROM t WHERE id IN (?)")
+
+
+def test_find_repeated_skips_transaction_control():
+    statements = collections.Counter(
+        {
+            "BEGIN": 5,
+            "SELECT * FROM t WHERE id = $1::INTEGER": 2,
+            "SELECT * FROM t WHERE id = $2::INTEGER": 1,
+            "SELECT 1": 1,
+        }
+    )
+
+    assert find_repeated(statements, threshold=3) == {
+        "SELECT * FROM t WHERE id = ?::INTEGER": 3
+    }
+
+
+@pytest.fixture
+def budget_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        settings.observability, "QUERY_BUDGET_MODE", "raise"
+    )
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'budget.db'}", PoolStats()
+    )
+    app = fastapi.FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/items")
+    @query_budget(2)
+    async def list_items(count: int = 1):
+        async with engine.connect() as conn:
+            for item_id in range(count):
+                await conn.execute(
+                    text("SELECT :id"), {"id": item_id}
+                )
+        return {"count": count}
+
+    @app.get("/wide")
+    @query_budget(1)
+    async def wide():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {}
+
+    yield app, engine
+
+
+async def _get(app, path: str):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        return await client.get(path)
+
+
+@pytest.mark.asyncio
+async def test_within_budget_passes(budget_app):
+    app, engine = budget_app
+    try:
+        response = await _get(app, "/items?count=2")
+    finally:
+        await engine.dispose()
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_over_budget_raises(budget_app):
+    app, engine = budget_app
+    try:
+        with pytest.raises(QueryBudgetExceeded, match="бюджете 1"):
+            await _get(app, "/wide")
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_repeated_statement_is_n_plus_one(budget_app, caplog):
+    """В режиме warn N+1 пишется в лог, запрос не падает."""
+    app, engine = budget_app
+    settings.observability.QUERY_BUDGET_MODE = "warn"
+    try:
+        response = await _get(app, "/items?count=3")
+    finally:
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert "N+1, 3 раз: SELECT ?" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_budget_enabled_at_runtime_sees_queries(tmp_path, monkeypatch):
+    """Бюджет работает, даже если движок создан при выключенных метриках."""
+    monkeypatch.setattr(settings.observability, "METRICS_ENABLED", False)
+    monkeypatch.setattr(settings.observability, "QUERY_BUDGET_MODE", "off")
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'late.db'}", PoolStats()
+    )
+    app = fastapi.FastAPI()
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/wide")
+    @query_budget(1)
+    async def wide():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {}
+
+    monkeypatch.setattr(
+        settings.observability, "QUERY_BUDGET_MODE", "raise"
+    )
+    try:
+        with pytest.raises(QueryBudgetExceeded, match="бюджете 1"):
+            await _get(app, "/wide")
+    finally:
+        await engine.dispose()
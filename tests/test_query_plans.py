@@ -0,0 +1,208 @@
+"""
+Регрессионные тесты планов запросов DAO.
+
+Каждый запрос DAO выполняется на засеянной базе PostgreSQL, после чего
+для перехваченного SQL строится EXPLAIN. Тест падает, если в плане
+встречается Seq Scan или полный проход по индексу без Index Cond.
+Seq scan отключается через enable_seqscan = off: планировщик выбирает
+его только тогда, когда подходящего индекса нет.
+
+Нужна живая база: TEST_DATABASE_URL=postgresql+asyncpg://...
+Без переменной тесты пропускаются.
+"""
+
+import os
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.dao.progress_dao import UserProgressDAO
+from app.dao.rollup_dao import WorkoutDailyRollupDAO
+from app.dao.summary_dao import UserWorkoutSummaryDAO
+from app.dao.users_dao import UsersDAO
+from app.dao.workout_session_dao import WorkoutSessionsDAO
+from app.models.models import Base, ExerciseType
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "query_plan_tests"
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан"
+)
+
+SEED_SQL = (
+    "INSERT INTO users (username, email, password) "
+    "SELECT 'user_' || g, 'user' || g || '@example.com', 'x' "
+    "FROM generate_series(1, 500) g",
+    "INSERT INTO user_progress "
+    "(user_id, exercise_type, difficulty, current_reps_per_set) "
+    "SELECT u.id, e, 'BEGINNER', 3 FROM users u "
+    "CROSS JOIN unnest(enum_range(NULL::exercise_type_enum)) e",
+    "INSERT INTO workout_sessions (user_id, exercise_type, difficulty, "
+    "reps_per_set_at_start, completed, created_at, updated_at) "
+    "SELECT g % 500 + 1, "
+    "(enum_range(NULL::exercise_type_enum))[g % 4 + 1], "
+    "'BEGINNER', 3, g % 3 <> 0, "
+    "now() - g * interval '1 minute', now() "
+    "FROM generate_series(1, 50000) g",
+    "INSERT INTO workout_daily_rollup "
+    "(user_id, exercise_type, day, started, completed, failed, reps_sum) "
+    "SELECT user_id, exercise_type, created_at::date, count(*), "
+    "count(*) FILTER (WHERE completed), "
+    "count(*) FILTER (WHERE NOT completed), 0 "
+    "FROM workout_sessions GROUP BY 1, 2, 3",
+    "INSERT INTO user_workout_summary (user_id, exercise_type, "
+    "session_count, completed_count, last_session_id, last_session_at) "
+    "SELECT DISTINCT ON (user_id, exercise_type) user_id, exercise_type, "
+    "count(*) OVER w, count(*) FILTER (WHERE completed) OVER w, "
+    "id, created_at FROM workout_sessions "
+    "WINDOW w AS (PARTITION BY user_id, exercise_type) "
+    "ORDER BY user_id, exercise_type, created_at DESC, id DESC",
+    "ANALYZE",
+)
+
+# Каждый случай — запрос DAO, план которого проверяется
+DAO_QUERIES = {
+    "users.get_by_id": lambda s: UsersDAO(s).get_by_id(42),
+    "users.find_by_login": lambda s: UsersDAO(s).find_by_login("user_42"),
+    "progress.list_by_user_id": lambda s: UserProgressDAO(
+        s
+    ).list_by_user_id(42),
+    "progress.list_for_update": lambda s: UserProgressDAO(
+        s
+    ).list_for_update(42),
+    "progress.get_version": lambda s: UserProgressDAO(s).get_version(42),
+    "progress.get_by_user_and_exercise": lambda s: UserProgressDAO(
+        s
+    ).get_by_user_and_exercise(42, ExerciseType.PULL_UPS),
+    "sessions.list_by_user": lambda s: WorkoutSessionsDAO(s).list_by_user(
+        42, limit=10, offset=20
+    ),
+    "sessions.list_by_user_and_exercise": lambda s: WorkoutSessionsDAO(
+        s
+    ).list_by_user_and_exercise(
+        42, ExerciseType.PULL_UPS, limit=10, offset=20
+    ),
+    "sessions.list_by_user_keyset": lambda s: WorkoutSessionsDAO(
+        s
+    ).list_by_user_keyset(42, limit=10, after=(datetime.now(), 10**9)),
+    "sessions.list_by_user_keyset_exercise": lambda s: WorkoutSessionsDAO(
+        s
+    ).list_by_user_keyset(
+        42,
+        limit=10,
+        exercise_type=ExerciseType.PULL_UPS,
+        before=(datetime(2000, 1, 1), 0),
+    ),
+    "sessions.stream_by_user": lambda s: WorkoutSessionsDAO(
+        s
+    ).stream_by_user(42, exercise_type=ExerciseType.PULL_UPS),
+    "sessions.stats_by_user": lambda s: WorkoutSessionsDAO(
+        s
+    ).stats_by_user(42),
+    "sessions.stats_by_user_exercise": lambda s: WorkoutSessionsDAO(
+        s
+    ).stats_by_user(42, exercise_type=ExerciseType.PULL_UPS),
+    "sessions.list_last_per_exercise": lambda s: WorkoutSessionsDAO(
+        s
+    ).list_last_per_exercise(42),
+    "sessions.get_row_by_id": lambda s: WorkoutSessionsDAO(
+        s
+    ).get_row_by_id(100),
+    "sessions.get_by_id_and_user": lambda s: WorkoutSessionsDAO(
+        s
+    ).get_by_id_and_user(100, 42),
+    "sessions.finish_with_progress": lambda s: WorkoutSessionsDAO(
+        s
+    ).finish_with_progress(100, 42, completed=True),
+    "rollup.list_by_user": lambda s: WorkoutDailyRollupDAO(s).list_by_user(
+        42, date(2000, 1, 1), date(2100, 1, 1)
+    ),
+    "rollup.list_by_user_exercise": lambda s: WorkoutDailyRollupDAO(
+        s
+    ).list_by_user(
+        42,
+        date(2000, 1, 1),
+        date(2100, 1, 1),
+        exercise_type=ExerciseType.PULL_UPS,
+    ),
+    "summary.count_sessions": lambda s: UserWorkoutSummaryDAO(
+        s
+    ).count_sessions(42),
+    "summary.count_sessions_exercise": lambda s: UserWorkoutSummaryDAO(
+        s
+    ).count_sessions(42, ExerciseType.PULL_UPS),
+    "summary.get_last": lambda s: UserWorkoutSummaryDAO(s).get_last(42),
+    "summary.get_last_exercise": lambda s: UserWorkoutSummaryDAO(
+        s
+    ).get_last(42, ExerciseType.PULL_UPS),
+}
+
+
+def find_seq_scans(plan: dict) -> list[str]:
+    """Рекурсивно собрать таблицы, которые читаются целиком."""
+    found = []
+    node_type = plan.get("Node Type")
+    full_index_scan = (
+        node_type in ("Index Scan", "Index Only Scan")
+        and "Index Cond" not in plan
+    )
+    if node_type == "Seq Scan" or full_index_scan:
+        found.append(f"{plan.get('Relation Name', '?')} ({node_type})")
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+@pytest_asyncio.fixture
+async def plan_engine():
+    """Создает отдельную схему с засеянными таблицами."""
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED_SQL:
+            await conn.execute(text(statement))
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(DAO_QUERIES))
+async def test_dao_query_uses_index(plan_engine, name):
+    """Запрос DAO не должен сваливаться в последовательное чтение."""
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    async with plan_engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        event.listen(conn.sync_connection, "before_cursor_execute", capture)
+        async with AsyncSession(bind=conn) as session:
+            await DAO_QUERIES[name](session)
+        event.remove(conn.sync_connection, "before_cursor_execute", capture)
+
+        assert captured, f"{name}: запрос не был выполнен"
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar_one()[0]["Plan"]
+            seq_scans = find_seq_scans(plan)
+            assert not seq_scans, (
+                f"{name}: полное чтение {seq_scans}\n{statement}"
+            )
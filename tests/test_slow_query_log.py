@@ -0,0 +1,128 @@
+"""
+Лог медленных запросов. На SQLite проверяются запись и маскировка
+параметров, EXPLAIN снимается только в PostgreSQL
+(TEST_DATABASE_URL=postgresql+asyncpg://..., иначе тест пропускается).
+"""
+
+import json
+import logging
+import os
+
+import fastapi
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import PoolStats, build_engine
+from app.core.metrics import RequestContextMiddleware
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def log_every_query(monkeypatch, caplog):
+    monkeypatch.setattr(settings.db, "DB_SLOW_QUERY_MS", 1e-6)
+    monkeypatch.setattr(settings.db, "DB_SLOW_QUERY_EXPLAIN_RATE", 1.0)
+    caplog.set_level(logging.WARNING, logger="app.slow_query")
+    return caplog
+
+
+def slow_query_records(caplog) -> list[dict]:
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == "app.slow_query"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged_with_redacted_parameters(
+    tmp_path, log_every_query
+):
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}",
+        PoolStats(),
+        name="test",
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(
+                text("SELECT :password, :user_id"),
+                {"password": "secret", "user_id": 42},
+            )
+    finally:
+        await engine.dispose()
+
+    [record] = [
+        r
+        for r in slow_query_records(log_every_query)
+        if r["statement"].startswith("SELECT")
+    ]
+    assert record["engine"] == "test"
+    assert record["route"] is None
+    assert record["parameters"] == ["<str>", "<int>"]
+    assert "secret" not in log_every_query.text
+    # В SQLite плана нет
+    assert "plan" not in record
+
+
+@pytest.mark.asyncio
+async def test_slow_query_route_without_metrics(tmp_path, log_every_query):
+    """Маршрут попадает в запись и без MetricsMiddleware."""
+    engine = build_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'route.db'}", PoolStats()
+    )
+    app = fastapi.FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {"id": item_id}
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get("/items/1")
+    finally:
+        await engine.dispose()
+
+    assert response.status_code == 200
+    [record] = [
+        r
+        for r in slow_query_records(log_every_query)
+        if r["statement"].startswith("SELECT")
+    ]
+    assert record["route"] == "GET /items/{item_id}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан"
+)
+async def test_slow_select_gets_explain_plan(log_every_query):
+    engine = build_engine(TEST_DATABASE_URL, PoolStats())
+    try:
+        async with engine.begin() as conn:
+            value = await conn.scalar(
+                text("SELECT count(*) FROM generate_series(1, :n)"),
+                {"n": 1000},
+            )
+            # Транзакция жива после EXPLAIN в SAVEPOINT
+            assert await conn.scalar(text("SELECT 1")) == 1
+    finally:
+        await engine.dispose()
+
+    assert value == 1000
+    [record] = [
+        r
+        for r in slow_query_records(log_every_query)
+        if "generate_series" in r["statement"]
+    ]
+    [plan] = record["plan"]
+    assert plan["Plan"]["Node Type"] == "Aggregate"
+    assert "Execution Time" in plan
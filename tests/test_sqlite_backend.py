@@ -0,0 +1,143 @@
+"""
+Приложение целиком на SQLite: пишущий движок с одним соединением и
+пул читателей поверх одного файла в WAL-режиме. Сеть не нужна.
+"""
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import PoolStats, build_engine, get_session, init_schema
+from app.core.security import get_read_session, get_user_read_session
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def sqlite_engines(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'fitness.db'}"
+    writer = build_engine(url, PoolStats())
+    reader = build_engine(url, PoolStats(), read_only=True)
+    await init_schema(writer)
+
+    yield writer, reader
+
+    await writer.dispose()
+    await reader.dispose()
+
+
+@pytest_asyncio.fixture
+async def sqlite_client(sqlite_engines, monkeypatch):
+    writer, reader = sqlite_engines
+    # Превышение бюджета SQL или N+1 роняет запрос прямо в тесте
+    monkeypatch.setattr(
+        settings.observability, "QUERY_BUDGET_MODE", "raise"
+    )
+    writer_session = async_sessionmaker(
+        writer, class_=AsyncSession, expire_on_commit=False
+    )
+    reader_session = async_sessionmaker(
+        reader, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override_get_session():
+        async with writer_session() as session:
+            yield session
+
+    async def override_get_read_session():
+        async with reader_session() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_read_session
+    app.dependency_overrides[get_user_read_session] = (
+        override_get_read_session
+    )
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(sqlite_engines):
+    """Писатель в WAL с внешними ключами, читатель не может писать."""
+    writer, reader = sqlite_engines
+    async with writer.connect() as conn:
+        journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+        foreign_keys = await conn.scalar(text("PRAGMA foreign_keys"))
+    assert journal_mode == "wal"
+    assert foreign_keys == 1
+    assert writer.pool.size() == 1
+
+    async with reader.connect() as conn:
+        with pytest.raises(OperationalError):
+            await conn.execute(text("DELETE FROM users"))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_workout_flow(sqlite_client):
+    """Регистрация, прогресс, старт/завершение и чтения на SQLite."""
+    client = sqlite_client
+    response = await client.post(
+        "/auth/register",
+        json={"username": "alice", "email": "a@example.com", "password": "pw"},
+    )
+    assert response.status_code == 201
+    response = await client.post(
+        "/auth/login", data={"username": "alice", "password": "pw"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await client.get("/auth/me", headers=headers)
+    assert response.json()["username"] == "alice"
+    assert "password" not in response.json()
+
+    response = await client.post(
+        "/progress/",
+        json={"exercise_type": "подтягивания", "current_reps_per_set": 5},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    for completed in (True, False, True):
+        response = await client.post(
+            "/sessions/start",
+            json={"exercise_type": "подтягивания"},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        response = await client.patch(
+            f"/sessions/{response.json()['id']}/finish",
+            json={"completed": completed},
+            headers=headers,
+        )
+        assert response.status_code == 200
+
+    response = await client.get("/progress/", headers=headers)
+    assert response.json()[0]["current_reps_per_set"] == 7
+    assert response.json()[0]["difficulty"] == "живчик"
+
+    response = await client.get("/sessions/?size=2", headers=headers)
+    assert response.json()["total"] == 3
+    assert response.json()["pages"] == 2
+
+    response = await client.get("/sessions/last", headers=headers)
+    assert response.json()["id"] == 3
+
+    response = await client.get("/me/dashboard", headers=headers)
+    dashboard = response.json()
+    assert dashboard["user"]["username"] == "alice"
+    assert dashboard["progress"][0]["current_reps_per_set"] == 7
+    assert [s["id"] for s in dashboard["last_sessions"]] == [3]
+
+    response = await client.get("/stats/calendar", headers=headers)
+    [day] = response.json()
+    assert (day["started"], day["completed"], day["failed"]) == (3, 2, 1)
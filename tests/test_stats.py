@@ -0,0 +1,167 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.security import get_current_principal
+from app.dao.rollup_dao import merge_rollup_rows, session_counters
+from app.models.models import ExerciseType
+from app.routers.stats import get_stats_service
+from app.services.stats_service import StatsService
+from unittest.mock import AsyncMock, MagicMock
+from datetime import date, datetime, timedelta, timezone
+
+
+def make_stats_row(**overrides) -> MagicMock:
+    """Мок строки агрегата по упражнению."""
+    row = MagicMock()
+    row.exercise_type = ExerciseType.PULL_UPS
+    row.total_sessions = 4
+    row.completed_sessions = 3
+    row.avg_reps = 4.5
+    row.best_reps = 6
+    row.last_success_at = None
+    row.recent_sessions = 4
+    row.recent_completed = 3
+    for key, value in overrides.items():
+        setattr(row, key, value)
+    return row
+
+
+@pytest.mark.asyncio
+async def test_stats_rates_and_last_success():
+    """Доли и время с последнего успеха считаются из агрегатов."""
+    last_success = datetime.now(timezone.utc).replace(
+        tzinfo=None
+    ) - timedelta(hours=1)
+    service = StatsService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.stats_by_user.return_value = [
+        make_stats_row(last_success_at=last_success, recent_completed=2)
+    ]
+
+    stats = await service.get_exercise_stats(user_id=1)
+
+    assert len(stats) == 1
+    assert stats[0].completion_rate == 0.75
+    assert stats[0].recent_completion_rate == 0.5
+    assert 3590 <= stats[0].seconds_since_last_success <= 3610
+    service.read_session_dao.stats_by_user.assert_called_once_with(
+        user_id=1,
+        exercise_type=None,
+        recent_window=StatsService.RECENT_WINDOW,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_without_success():
+    """Без успешных тренировок время с последнего успеха не задано."""
+    service = StatsService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.stats_by_user.return_value = [
+        make_stats_row(
+            completed_sessions=0, recent_completed=0, best_reps=None
+        )
+    ]
+
+    stats = await service.get_exercise_stats(user_id=1)
+
+    assert stats[0].completion_rate == 0.0
+    assert stats[0].best_reps is None
+    assert stats[0].seconds_since_last_success is None
+
+
+@pytest.mark.asyncio
+async def test_get_stats_endpoint():
+    """Эндпоинт передает фильтр по упражнению в сервис."""
+    principal = MagicMock()
+    principal.id = 1
+    service = AsyncMock()
+    service.get_exercise_stats.return_value = []
+
+    async def _get_current_principal():
+        return principal
+
+    app.dependency_overrides[get_current_principal] = _get_current_principal
+    app.dependency_overrides[get_stats_service] = lambda: service
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get(
+                "/stats/", params={"exercise_type": "отжимания"}
+            )
+
+        assert response.status_code == 200
+        assert response.json() == []
+        service.get_exercise_stats.assert_called_once_with(
+            user_id=1,
+            exercise_type=ExerciseType.PUSH_UPS,
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+
+# --- Дневной rollup ---
+
+
+def test_merge_rollup_rows_sums_same_day():
+    """Строки с одним ключом складываются перед upsert."""
+    day = date(2025, 1, 1)
+    rows = [
+        {
+            "user_id": 1,
+            "exercise_type": ExerciseType.SQUAT,
+            "day": day,
+            **session_counters(True, 5),
+        },
+        {
+            "user_id": 1,
+            "exercise_type": ExerciseType.SQUAT,
+            "day": day,
+            **session_counters(False, 6),
+        },
+        {
+            "user_id": 1,
+            "exercise_type": ExerciseType.SQUAT,
+            "day": day + timedelta(days=1),
+            **session_counters(True, 6),
+        },
+    ]
+
+    merged = merge_rollup_rows(rows)
+
+    assert merged == [
+        {
+            "user_id": 1,
+            "exercise_type": ExerciseType.SQUAT,
+            "day": day,
+            "started": 2,
+            "completed": 1,
+            "failed": 1,
+            "reps_sum": 5,
+        },
+        {
+            "user_id": 1,
+            "exercise_type": ExerciseType.SQUAT,
+            "day": day + timedelta(days=1),
+            "started": 1,
+            "completed": 1,
+            "failed": 0,
+            "reps_sum": 6,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_calendar_reads_rollup_period():
+    """Календарь читает rollup за последние days дней."""
+    service = StatsService(AsyncMock())
+    service.read_rollup_dao = AsyncMock()
+    service.read_rollup_dao.list_by_user.return_value = []
+
+    await service.get_calendar(user_id=1, days=7)
+
+    kwargs = service.read_rollup_dao.list_by_user.call_args.kwargs
+    assert kwargs["date_to"] - kwargs["date_from"] == timedelta(days=6)
+    assert kwargs["exercise_type"] is None
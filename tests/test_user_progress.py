@@ -1,11 +1,21 @@
+import json
+
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient, ASGITransport
+from pydantic import TypeAdapter
 from app.main import app
-from app.routers.user_progress import get_progress_service
-from app.core.security import get_current_user
+from app.routers.user_progress import (
+    get_progress_service,
+    get_progress_read_service,
+)
+from app.core.security import get_current_user, get_current_principal
+from app.core.serialization import orm_response
 from app.models.models import ExerciseType, Difficulty, User
+from app.schemas.user_progress import UserProgressReadSchema
+from app.services.user_progress_service import UserProgressService
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 @pytest.fixture
@@ -22,6 +32,10 @@ def mock_user():
 def mock_progress_service():
     """Мок для UserProgressService."""
     service = AsyncMock()
+    service.get_progress_etag.return_value = (
+        'W/"progress-v1"',
+        datetime(2025, 1, 1),
+    )
     return service
 
 
@@ -64,7 +78,10 @@ async def test_get_user_progress_success(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
-    app.dependency_overrides[get_progress_service] = (
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
         lambda: mock_progress_service
     )
 
@@ -82,6 +99,12 @@ async def test_get_user_progress_success(
         assert data[0]["user_id"] == 1
         assert data[0]["exercise_type"] == "подтягивания"
 
+        assert response.headers["etag"] == 'W/"progress-v1"'
+        assert (
+            response.headers["last-modified"]
+            == "Wed, 01 Jan 2025 00:00:00 GMT"
+        )
+
         # Проверяем, что сервис был вызван с правильными параметрами
         mock_progress_service.get_user_progress.assert_called_once_with(
             user_id=1
@@ -90,6 +113,35 @@ async def test_get_user_progress_success(
         app.dependency_overrides.clear()
 
 
+@pytest.mark.asyncio
+async def test_get_user_progress_not_modified(
+    mock_user, mock_progress_service
+):
+    """Совпавший If-None-Match отдает 304 без загрузки прогресса."""
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
+        lambda: mock_progress_service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get(
+                "/progress/", headers={"If-None-Match": '"progress-v1"'}
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == 'W/"progress-v1"'
+        mock_progress_service.get_user_progress.assert_not_called()
+    finally:
+        app.dependency_overrides.clear()
+
+
 @pytest.mark.asyncio
 async def test_get_progress_for_exercise_success(
     mock_user, mock_progress_service, mock_progress_data
@@ -104,7 +156,10 @@ async def test_get_progress_for_exercise_success(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
-    app.dependency_overrides[get_progress_service] = (
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
         lambda: mock_progress_service
     )
 
@@ -143,7 +198,10 @@ async def test_get_progress_for_exercise_not_found(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
-    app.dependency_overrides[get_progress_service] = (
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
         lambda: mock_progress_service
     )
 
@@ -176,6 +234,9 @@ async def test_create_progress_success(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
     app.dependency_overrides[get_progress_service] = (
         lambda: mock_progress_service
     )
@@ -215,6 +276,9 @@ async def test_create_progress_invalid_reps(mock_user, mock_progress_service):
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
     app.dependency_overrides[get_progress_service] = (
         lambda: mock_progress_service
     )
@@ -245,7 +309,10 @@ async def test_get_progress_invalid_exercise_type(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
-    app.dependency_overrides[get_progress_service] = (
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
         lambda: mock_progress_service
     )
 
@@ -271,7 +338,10 @@ async def test_get_progress_missing_exercise_type(
     app.dependency_overrides[get_current_user] = override_get_current_user(
         mock_user
     )
-    app.dependency_overrides[get_progress_service] = (
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_progress_read_service] = (
         lambda: mock_progress_service
     )
 
@@ -285,3 +355,37 @@ async def test_get_progress_missing_exercise_type(
         assert response.status_code == 422  # Missing required parameter
     finally:
         app.dependency_overrides.clear()
+
+
+def test_orm_response_matches_pydantic_json(mock_progress_data):
+    """orjson-ответ совпадает с JSON Pydantic, включая даты с таймзоной."""
+    progress_obj = MagicMock()
+    for key, value in mock_progress_data.items():
+        setattr(progress_obj, key, value)
+    progress_obj.last_success_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    response = orm_response(list[UserProgressReadSchema], [progress_obj])
+
+    expected = TypeAdapter(list[UserProgressReadSchema]).dump_json(
+        [UserProgressReadSchema.model_validate(progress_obj)]
+    )
+    assert json.loads(response.body) == json.loads(expected)
+    assert b'"2025-01-01T00:00:00Z"' in response.body
+
+
+@pytest.mark.asyncio
+async def test_create_progress_conflict():
+    """Повторный прогресс по упражнению — 409 вместо IntegrityError."""
+    service = UserProgressService(AsyncMock())
+    service.dao = AsyncMock()
+    service.dao.upsert.return_value = []
+
+    with pytest.raises(HTTPException) as exc_info:
+        await service.create_progress(
+            user_id=1, exercise_type=ExerciseType.SQUAT, reps=7
+        )
+
+    assert exc_info.value.status_code == 409
+    rows = service.dao.upsert.call_args.args[0]
+    assert rows[0]["difficulty"] == Difficulty.INTERMEDIATE
+    service.session.commit.assert_not_called()
@@ -0,0 +1,609 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.routers.workout_session import (
+    get_workout_session_service,
+    get_workout_session_read_service,
+)
+from app.core.database import get_session
+from app.core.security import get_current_user, get_current_principal
+from app.core.pagination import encode_cursor, decode_cursor
+from app.dao.summary_dao import merge_summary_rows
+from app.dao.workout_session_dao import WorkoutSessionsDAO
+from app.services.workout_session_service import WorkoutSessionService
+from app.models.models import (
+    ExerciseType,
+    Difficulty,
+    User,
+    UserProgress,
+    WorkoutSession,
+)
+from app.schemas.workout_session import WorkoutSessionBatchItemSchema
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def mock_user():
+    """Мок для текущего пользователя."""
+    user = MagicMock(spec=User)
+    user.id = 1
+    user.username = "testuser"
+    user.email = "test@example.com"
+    return user
+
+
+@pytest.fixture
+def mock_session_service():
+    """Мок для WorkoutSessionService."""
+    return AsyncMock()
+
+
+def make_session_obj(id_: int, created_at: datetime) -> MagicMock:
+    """Мок-объект сессии тренировки."""
+    obj = MagicMock()
+    obj.id = id_
+    obj.user_id = 1
+    obj.exercise_type = ExerciseType.PULL_UPS
+    obj.difficulty = Difficulty.BEGINNER
+    obj.reps_per_set_at_start = 3
+    obj.completed = True
+    obj.notes = None
+    obj.created_at = created_at
+    obj.updated_at = created_at
+    return obj
+
+
+def override_get_current_user(mock_user):
+    """Функция для переопределения зависимости get_current_user."""
+
+    async def _get_current_user():
+        return mock_user
+
+    return _get_current_user
+
+
+# --- Тесты курсора (без БД) ---
+
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 678)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_decode_cursor_invalid():
+    with pytest.raises(ValueError):
+        decode_cursor("не-курсор")
+
+
+# --- Тесты keyset-пагинации в сервисе ---
+
+
+@pytest.mark.asyncio
+async def test_cursor_first_page_has_next():
+    """Первая страница: лишняя запись означает наличие следующей."""
+    now = datetime(2025, 1, 1)
+    rows = [make_session_obj(i, now - timedelta(days=i)) for i in range(3)]
+
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.list_by_user_keyset.return_value = rows
+    service.read_summary_dao = AsyncMock()
+
+    data = await service.get_sessions_by_cursor(user_id=1, size=2)
+
+    assert data["items"] == rows[:2]
+    assert data["has_next"] is True
+    assert data["has_prev"] is False
+    assert decode_cursor(data["next_cursor"]) == (rows[1].created_at, 1)
+    assert data["prev_cursor"] is None
+    assert data["total"] is None
+    service.read_summary_dao.count_sessions.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cursor_before_page_keeps_newest_direction():
+    """Страница before: лишняя запись означает более новые сессии."""
+    now = datetime(2025, 1, 1)
+    rows = [make_session_obj(i, now - timedelta(days=i)) for i in range(3)]
+
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.list_by_user_keyset.return_value = rows
+
+    data = await service.get_sessions_by_cursor(
+        user_id=1,
+        size=2,
+        before=encode_cursor(now - timedelta(days=5), 5),
+    )
+
+    assert data["items"] == rows[1:]
+    assert data["has_next"] is True
+    assert data["has_prev"] is True
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_cursor_mode(mock_user, mock_session_service):
+    """Тест получения сессий в режиме курсора."""
+    now = datetime(2025, 1, 1)
+    mock_session_service.get_sessions_by_cursor.return_value = {
+        "items": [make_session_obj(1, now)],
+        "size": 1,
+        "next_cursor": encode_cursor(now, 1),
+        "prev_cursor": None,
+        "has_next": True,
+        "has_prev": False,
+        "total": None,
+    }
+
+    app.dependency_overrides[get_current_user] = override_get_current_user(
+        mock_user
+    )
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_workout_session_read_service] = (
+        lambda: mock_session_service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get("/sessions/?pagination=cursor&size=1")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["next_cursor"] == encode_cursor(now, 1)
+        assert data["has_next"] is True
+        assert "pages" not in data
+        mock_session_service.get_sessions_by_cursor.assert_called_once_with(
+            user_id=1,
+            size=1,
+            after=None,
+            before=None,
+            include_total=False,
+        )
+        mock_session_service.get_user_sessions_paginated.assert_not_called()
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_invalid_cursor(mock_user):
+    """Тест запроса с поврежденным курсором."""
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+
+    app.dependency_overrides[get_current_user] = override_get_current_user(
+        mock_user
+    )
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_workout_session_read_service] = (
+        lambda: service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get("/sessions/?after=broken")
+
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_start_session_skips_principal(mock_user, monkeypatch):
+    """Запись не разбирает токен второй раз через principal."""
+    now = datetime(2025, 1, 1)
+    start_session = AsyncMock(return_value=make_session_obj(1, now))
+    monkeypatch.setattr(WorkoutSessionService, "start_session", start_session)
+
+    async def override_get_session():
+        yield AsyncMock()
+
+    app.dependency_overrides[get_current_user] = override_get_current_user(
+        mock_user
+    )
+    app.dependency_overrides[get_session] = override_get_session
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            # Без заголовка Authorization principal ответил бы 401
+            response = await ac.post(
+                "/sessions/start", json={"exercise_type": "подтягивания"}
+            )
+
+        assert response.status_code == 201
+        start_session.assert_called_once()
+    finally:
+        app.dependency_overrides.clear()
+
+
+# --- Тесты пакетной загрузки ---
+
+
+@pytest.mark.asyncio
+async def test_ingest_batch_replays_progress():
+    """Прогресс пересчитывается в памяти, сессии вставляются одной пачкой."""
+    progress = UserProgress(
+        user_id=1,
+        exercise_type=ExerciseType.PULL_UPS,
+        difficulty=Difficulty.BEGINNER,
+        current_reps_per_set=5,
+    )
+    service = WorkoutSessionService(AsyncMock())
+    service.progress_dao = AsyncMock()
+    service.progress_dao.list_for_update.return_value = [progress]
+    service.progress_dao.list_by_user_id.return_value = [progress]
+    service.session_dao = AsyncMock()
+    service.session_dao.bulk_create.side_effect = lambda rows: rows
+    service.rollup_dao = AsyncMock()
+    service.summary_dao = AsyncMock()
+
+    performed_at = datetime(
+        2025, 1, 1, 10, tzinfo=timezone(timedelta(hours=3))
+    )
+    items = [
+        WorkoutSessionBatchItemSchema(
+            exercise_type=ExerciseType.PULL_UPS,
+            completed=True,
+            performed_at=performed_at,
+        ),
+        WorkoutSessionBatchItemSchema(
+            exercise_type=ExerciseType.PULL_UPS, completed=False
+        ),
+        WorkoutSessionBatchItemSchema(
+            exercise_type=ExerciseType.PULL_UPS, completed=True
+        ),
+    ]
+
+    result = await service.ingest_batch(user_id=1, items=items)
+
+    rows = result["sessions"]
+    assert [r["reps_per_set_at_start"] for r in rows] == [5, 6, 6]
+    assert [r["difficulty"] for r in rows] == [
+        Difficulty.BEGINNER,
+        Difficulty.INTERMEDIATE,
+        Difficulty.INTERMEDIATE,
+    ]
+    assert rows[0]["created_at"] == datetime(2025, 1, 1, 7)
+    assert progress.current_reps_per_set == 7
+    assert progress.difficulty == Difficulty.INTERMEDIATE
+    service.session_dao.bulk_create.assert_awaited_once()
+    rollup_rows = service.rollup_dao.increment.call_args.args[0]
+    assert sum(r["started"] for r in rollup_rows) == 3
+    assert sum(r["completed"] for r in rollup_rows) == 2
+    assert sum(r["failed"] for r in rollup_rows) == 1
+    service.summary_dao.record_sessions.assert_awaited_once_with(rows)
+    service.session.commit.assert_awaited_once()
+
+    # Старая офлайн-тренировка не откатывает последний успех назад
+    latest_success = progress.last_success_at
+    await service.ingest_batch(
+        user_id=1,
+        items=[
+            WorkoutSessionBatchItemSchema(
+                exercise_type=ExerciseType.PULL_UPS,
+                completed=True,
+                performed_at=latest_success - timedelta(days=16),
+            )
+        ],
+    )
+    assert progress.current_reps_per_set == 8
+    assert progress.last_success_at == latest_success
+
+
+@pytest.mark.asyncio
+async def test_ingest_batch_rejects_future_performed_at():
+    """Часы клиента в будущем: пачка отклоняется целиком."""
+    progress = UserProgress(
+        user_id=1,
+        exercise_type=ExerciseType.PULL_UPS,
+        difficulty=Difficulty.BEGINNER,
+        current_reps_per_set=5,
+    )
+    service = WorkoutSessionService(AsyncMock())
+    service.progress_dao = AsyncMock()
+    service.progress_dao.list_for_update.return_value = [progress]
+    service.session_dao = AsyncMock()
+
+    items = [
+        WorkoutSessionBatchItemSchema(
+            exercise_type=ExerciseType.PULL_UPS,
+            completed=True,
+            performed_at=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+    ]
+    with pytest.raises(HTTPException) as exc_info:
+        await service.ingest_batch(user_id=1, items=items)
+
+    assert exc_info.value.status_code == 400
+    assert progress.current_reps_per_set == 5
+    service.session_dao.bulk_create.assert_not_called()
+    service.session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ingest_batch_without_progress():
+    """Без прогресса по упражнению пачка отклоняется целиком."""
+    service = WorkoutSessionService(AsyncMock())
+    service.progress_dao = AsyncMock()
+    service.progress_dao.list_for_update.return_value = []
+    service.session_dao = AsyncMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await service.ingest_batch(
+            user_id=1,
+            items=[
+                WorkoutSessionBatchItemSchema(
+                    exercise_type=ExerciseType.SQUAT, completed=True
+                )
+            ],
+        )
+
+    assert exc_info.value.status_code == 400
+    service.session_dao.bulk_create.assert_not_called()
+    service.session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ingest_batch_empty_rejected(mock_user, mock_session_service):
+    """Пустая пачка не проходит валидацию."""
+    app.dependency_overrides[get_current_user] = override_get_current_user(
+        mock_user
+    )
+    app.dependency_overrides[get_workout_session_service] = (
+        lambda: mock_session_service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.post("/sessions/batch", json={"items": []})
+
+        assert response.status_code == 422
+        mock_session_service.ingest_batch.assert_not_called()
+    finally:
+        app.dependency_overrides.clear()
+
+
+# --- Тесты выгрузки ---
+
+
+class FakeStreamResult:
+    """Имитация AsyncResult с серверным курсором."""
+
+    def __init__(self, partitions):
+        self._partitions = partitions
+        self.closed = False
+
+    async def partitions(self):
+        for partition in self._partitions:
+            yield partition
+
+    async def close(self):
+        self.closed = True
+
+
+EXPORT_ROW = (
+    1,
+    ExerciseType.PULL_UPS,
+    Difficulty.BEGINNER,
+    3,
+    True,
+    None,
+    datetime(2025, 1, 1),
+    datetime(2025, 1, 1),
+)
+
+
+def make_export_service(partitions) -> WorkoutSessionService:
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.EXPORT_COLUMNS = (
+        WorkoutSessionsDAO.EXPORT_COLUMNS
+    )
+    service.read_session_dao.stream_by_user.return_value = FakeStreamResult(
+        partitions
+    )
+    return service
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_chunk_per_partition():
+    """Каждая пачка курсора превращается в один кусок NDJSON."""
+    service = make_export_service([[EXPORT_ROW, EXPORT_ROW], [EXPORT_ROW]])
+
+    chunks = [
+        chunk
+        async for chunk in service.export_sessions(
+            user_id=1, export_format="ndjson"
+        )
+    ]
+
+    assert len(chunks) == 2
+    lines = "".join(chunks).splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0]) == {
+        "id": 1,
+        "exercise_type": "подтягивания",
+        "difficulty": "дохляк",
+        "reps_per_set_at_start": 3,
+        "completed": True,
+        "notes": None,
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+    }
+    stream = service.read_session_dao.stream_by_user.return_value
+    assert stream.closed
+
+
+@pytest.mark.asyncio
+async def test_export_csv_header_without_rows():
+    """CSV без сессий состоит только из заголовка."""
+    service = make_export_service([])
+
+    chunks = [
+        chunk
+        async for chunk in service.export_sessions(
+            user_id=1, export_format="csv"
+        )
+    ]
+
+    assert "".join(chunks).strip() == ",".join(
+        WorkoutSessionsDAO.EXPORT_COLUMNS
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_csv(mock_user):
+    """Эндпоинт отдает поток с нужным media type."""
+    service = make_export_service([[EXPORT_ROW]])
+
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_workout_session_read_service] = (
+        lambda: service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get("/sessions/export?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[1].startswith("1,подтягивания,дохляк,3,True,")
+    finally:
+        app.dependency_overrides.clear()
+
+
+# --- Условные запросы ---
+
+
+@pytest.mark.asyncio
+async def test_get_last_session_not_modified(mock_user):
+    """Последняя сессия не грузится, если ETag совпал."""
+    version = MagicMock()
+    version.last_session_id = 7
+    version.updated_at = datetime(2025, 1, 1)
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_summary_dao = AsyncMock()
+    service.read_summary_dao.get_last.return_value = version
+    etag, _ = await service.get_last_session_etag(user_id=1)
+
+    app.dependency_overrides[get_current_principal] = (
+        override_get_current_user(mock_user)
+    )
+    app.dependency_overrides[get_workout_session_read_service] = (
+        lambda: service
+    )
+
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as ac:
+            response = await ac.get(
+                "/sessions/last", headers={"If-None-Match": etag}
+            )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        service.read_session_dao.get_row_by_id.assert_not_called()
+    finally:
+        app.dependency_overrides.clear()
+
+
+# --- Сводка по сессиям ---
+
+
+def test_merge_summary_rows_keeps_latest_pointer():
+    """Счетчики суммируются, указатель — на самую новую сессию."""
+    now = datetime(2025, 1, 1)
+    sessions = [
+        make_session_obj(5, now),
+        make_session_obj(3, now + timedelta(hours=1)),
+        make_session_obj(4, now + timedelta(hours=1)),
+    ]
+    sessions[1].completed = False
+
+    [row] = merge_summary_rows(sessions)
+
+    assert row["session_count"] == 3
+    assert row["completed_count"] == 2
+    assert row["last_session_id"] == 4
+    assert row["last_session_at"] == now + timedelta(hours=1)
+
+
+@pytest.mark.asyncio
+async def test_paginated_total_from_summary():
+    """Total страницы берется из сводки, COUNT по сессиям не нужен."""
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_session_dao.list_by_user.return_value = []
+    service.read_summary_dao = AsyncMock()
+    service.read_summary_dao.count_sessions.return_value = 25
+
+    data = await service.get_user_sessions_paginated(
+        user_id=1, page=1, size=10
+    )
+
+    assert data["total"] == 25
+    assert data["pages"] == 3
+    service.read_session_dao.count.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_last_session_by_summary_pointer():
+    """Последняя сессия читается по id из сводки."""
+    last = MagicMock()
+    last.last_session_id = 7
+    service = WorkoutSessionService(AsyncMock())
+    service.read_session_dao = AsyncMock()
+    service.read_summary_dao = AsyncMock()
+    service.read_summary_dao.get_last.return_value = last
+
+    await service.get_last_session(user_id=1)
+
+    service.read_session_dao.get_row_by_id.assert_awaited_once_with(7)
+
+
+# --- Проекция колонок в DAO ---
+
+
+@pytest.mark.asyncio
+async def test_list_rows_selects_only_columns():
+    """list_rows выбирает колонки, а не ORM-сущность."""
+    session = AsyncMock()
+    session.execute.return_value = MagicMock()
+    dao = WorkoutSessionsDAO(session)
+
+    await dao.list_rows(columns=["id", "created_at"], user_id=1, limit=5)
+
+    stmt = session.execute.call_args.args[0]
+    assert [c.name for c in stmt.selected_columns] == ["id", "created_at"]
+    assert all(
+        d["type"] is not WorkoutSession for d in stmt.column_descriptions
+    )